@@ -1,38 +1,55 @@
 import uuid
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException, status, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import security
 from app.core.config import settings
 from app.db.models import Cliente
-from app.db.session import get_db
-from app.services import autenticacao_servico, cliente_servico
+from app.db.session import get_db, get_db_leitura
+from app.schemas.autenticacao_schema import TokenAtualizar, Tokens
+from app.services import autenticacao_servico, cache_cliente_servico, cliente_servico
 
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 router = APIRouter()
 
 logger = structlog.get_logger(__name__)
 
-@router.post("/token")
+def _obter_ip_cliente(request: Request) -> str | None:
+    """
+    IP de quem fez a requisição. Com `LOGIN_CABECALHO_IP_CLIENTE`, vem desse cabeçalho, preenchido
+    pelo balanceador; se ele trouxer uma lista (como o X-Forwarded-For), vale o último endereço,
+    o único adicionado pelo próprio balanceador. Sem o cabeçalho, é o endereço da conexão.
+    """
+    if settings.LOGIN_CABECALHO_IP_CLIENTE:
+        valor = request.headers.get(settings.LOGIN_CABECALHO_IP_CLIENTE)
+        if valor and (ip := valor.split(",")[-1].strip()):
+            return ip
+    return request.client.host if request.client else None
+
+@router.post("/token", response_model=Tokens)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Autentica o cliente e retorna um token de acesso JWT.
+    Autentica o cliente e retorna um token de acesso JWT, de curta duração,
+    e um token de atualização para obter novos tokens de acesso em `/auth/refresh`.
     """
     username = form_data.username
 
     logger.info("Tentativa de login recebida", username=username)
 
-    token = await autenticacao_servico.autenticar_cliente(
+    await autenticacao_servico.verificar_limite_login(email=username, ip=_obter_ip_cliente(request))
+
+    tokens = await autenticacao_servico.autenticar_cliente(
         db, email=username, password=form_data.password
     )
-    if not token:
+    if not tokens:
         logger.warn("Falha na autenticação", username=username, reason="Credenciais inválidas")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,40 +58,100 @@ async def login(
         )
 
     logger.info("Login bem-sucedido", username=username)
-    return {"access_token": token, "token_type": "bearer"}
+    return tokens
 
-
-async def obter_cliente_logado(
-    token: str = Depends(oauth2_schema),
+@router.post("/refresh", response_model=Tokens)
+async def renovar_token(
+    token_atualizar: TokenAtualizar,
     db: AsyncSession = Depends(get_db)
-) -> Cliente:
+):
     """
-    Decodifica o token, valida e retorna o usuário logado.
+    Troca um token de atualização válido por um novo par de tokens, se o cliente continuar ativo.
     """
-    credentials_exception = HTTPException(
+    tokens = await autenticacao_servico.renovar_tokens(db, token_atualizar.refresh_token)
+    if not tokens:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de atualização inválido ou revogado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return tokens
+
+
+def _erro_credenciais() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais do usuário",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decodificar_token_acesso(token: str) -> tuple[uuid.UUID, int]:
+    """Valida o token de acesso e retorna o ID do cliente e a versão de token com que foi emitido."""
     try:
-        payload = jwt.decode(token, settings.CHAVE_SEGURANCA_JWT, algorithms=[security.ALGORITHM])
-        id_cliente_str: str | None = payload.get("sub")
+        payload = security.verificar_token(token)
+    except JWTError as err:
+        raise _erro_credenciais() from err
 
-        if id_cliente_str is None:
-            raise credentials_exception
+    id_cliente_str: str | None = payload.get("sub")
+    if id_cliente_str is None or payload.get("typ", security.TIPO_TOKEN_ACESSO) != security.TIPO_TOKEN_ACESSO:
+        raise _erro_credenciais()
+    try:
+        id_cliente = uuid.UUID(id_cliente_str)
+    except ValueError as value_error:
+        raise _erro_credenciais() from value_error
+    return id_cliente, payload.get("ver", 0)
 
-        try:
-            id_cliente = uuid.UUID(id_cliente_str)
-        except ValueError as value_error:
-            raise credentials_exception from value_error
-    except JWTError as err:
-        raise credentials_exception from err
+async def obter_cliente_logado(
+    token: str = Depends(oauth2_schema),
+    db: AsyncSession = Depends(get_db_leitura)
+) -> Cliente:
+    """
+    Decodifica o token, valida e retorna o usuário logado.
+    """
+    id_cliente, versao_token = _decodificar_token_acesso(token)
 
-    cliente = await cliente_servico.recuperar_cliente(db, id=id_cliente)
-    if cliente is None:
-        raise credentials_exception
+    cliente = await cliente_servico.recuperar_cliente_em_cache(db, id=id_cliente)
+    if cliente is None or (cliente.versao_token or 0) != versao_token:
+        raise _erro_credenciais()
     return cliente
 
+async def obter_referencia_cliente_logado(
+    token: str = Depends(oauth2_schema),
+    db: AsyncSession = Depends(get_db_leitura)
+) -> Cliente:
+    """
+    Como `obter_cliente_logado`, para rotas que só precisam do ID do cliente logado.
+    Com `AUTORIZACAO_SEM_CONSULTA_BD`, confia no token de acesso e apenas confere no Redis se ele
+    foi revogado, retornando um `Cliente` transiente que contém somente o ID e a versão de token.
+    Se a versão publicada for desconhecida (ou o Redis estiver indisponível), recorre à consulta
+    completa e republica a versão lida do banco para as próximas requisições.
+    """
+    if not settings.AUTORIZACAO_SEM_CONSULTA_BD:
+        return await obter_cliente_logado(token=token, db=db)
+
+    id_cliente, versao_token = _decodificar_token_acesso(token)
+    versao_publicada = await cache_cliente_servico.obter_versao_token(id_cliente)
+    if versao_publicada is None:
+        cliente = await obter_cliente_logado(token=token, db=db)
+        await cache_cliente_servico.republicar_versao_token(cliente.id, cliente.versao_token or 0)
+        return cliente
+    if versao_publicada > versao_token:
+        raise _erro_credenciais()
+    return Cliente(id=id_cliente, versao_token=versao_token)
+
+def _verificar_acesso_ao_recurso(id: uuid.UUID, cliente_logado: Cliente) -> Cliente:
+    if id != cliente_logado.id:
+        logger.warn(
+            "Acesso não autorizado a recurso",
+            logged_in_client_id=cliente_logado.id,
+            target_resource_client_id=id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Não tem permissão para realizar esta ação neste recurso.",
+        )
+    return cliente_logado
+
 async def obter_cliente_autorizado(
     id: uuid.UUID = Path(
         ...,
@@ -90,14 +167,18 @@ async def obter_cliente_autorizado(
     3. Lança uma exceção 403 Forbidden se não for o mesmo.
     4. Retorna o objeto do usuário se a verificação passar.
     """
-    if id != cliente_logado.id:
-        logger.warn(
-            "Acesso não autorizado a recurso",
-            logged_in_client_id=cliente_logado.id,
-            target_resource_client_id=id
-        )
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Não tem permissão para realizar esta ação neste recurso.",
-        )
-    return cliente_logado
+    return _verificar_acesso_ao_recurso(id, cliente_logado)
+
+async def obter_referencia_cliente_autorizado(
+    id: uuid.UUID = Path(
+        ...,
+        description="ID único do cliente no formato UUID",
+        example="123e4567-e89b-12d3-a456-426614174000"
+    ),
+    cliente_logado: Cliente = Depends(obter_referencia_cliente_logado)
+) -> Cliente:
+    """
+    Como `obter_cliente_autorizado`, mas baseada em `obter_referencia_cliente_logado`:
+    para rotas que usam apenas o ID do cliente autorizado.
+    """
+    return _verificar_acesso_ao_recurso(id, cliente_logado)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.rotas.autenticacao_api import obter_cliente_autorizado
+from app.api.v1.rotas.autenticacao_api import obter_cliente_autorizado, obter_referencia_cliente_autorizado
 from app.db.models import Cliente
 from app.db.session import get_db
 from app.schemas.cliente_schema import ClienteAtualizar, ClienteCadastrar, ClienteDetalhar
@@ -44,7 +44,7 @@ async def recuperar_cliente(
 async def atualizar_cliente(
     cliente_atualizar: ClienteAtualizar,
     db: AsyncSession = Depends(get_db),
-    cliente_autorizado: Cliente = Depends(obter_cliente_autorizado),
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
 ) -> ClienteDetalhar:
     """
     Atualiza os dados de um cliente existente.
@@ -60,7 +60,7 @@ async def atualizar_cliente(
 )
 async def excluir_cliente(
     db: AsyncSession = Depends(get_db),
-    cliente_autorizado: Cliente = Depends(obter_cliente_autorizado),
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
 ) -> Response:
     """
     Excluir um cliente do sistema.
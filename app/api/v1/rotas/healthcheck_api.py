@@ -1,12 +1,15 @@
+import hmac
 import time
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.openapi_docs import health_check_responses
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import estatisticas_pool, estatisticas_pool_leitura, get_db
+from app.services.api_produtos_servico import buscas_em_andamento, cache_local_produtos, circuito_api_produtos
 
 router = APIRouter()
 
@@ -51,3 +54,38 @@ async def health_check(
     status_code = status.HTTP_200_OK if app_status == "ok" else status.HTTP_503_SERVICE_UNAVAILABLE
 
     return JSONResponse(content=response_content, status_code=status_code)
+
+async def verificar_acesso_metricas(x_chave_metricas: str | None = Header(None)):
+    """
+    Restringe as métricas internas: a rota só existe com `METRICAS_HABILITADAS` e, com
+    `CHAVE_METRICAS` configurada, exige essa chave no cabeçalho `X-Chave-Metricas`.
+    """
+    if not settings.METRICAS_HABILITADAS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.CHAVE_METRICAS and not hmac.compare_digest(
+        (x_chave_metricas or "").encode("utf-8"), settings.CHAVE_METRICAS.encode("utf-8")
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Chave de métricas inválida.")
+
+@router.get(
+    "/metricas",
+    summary="Métricas internas da aplicação",
+    tags=["Health Check"],
+    include_in_schema=False,
+    dependencies=[Depends(verificar_acesso_metricas)],
+)
+async def metricas():
+    """
+    Retorna métricas internas do processo que atendeu a requisição, como
+    a utilização do cache local de produtos, o estado do disjuntor da API de produtos
+    e a ocupação do pool de conexões com o banco. Desabilitada por padrão.
+    """
+    return {
+        "pool_banco_de_dados": estatisticas_pool(),
+        "pool_banco_de_dados_leitura": estatisticas_pool_leitura(),
+        "cache_local_produtos": cache_local_produtos.estatisticas(),
+        "api_produtos": {
+            "circuito": circuito_api_produtos.estatisticas(),
+            "buscas_em_andamento": len(buscas_em_andamento),
+        },
+    }
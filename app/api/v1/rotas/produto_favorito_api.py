@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, Query, Response, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.api.v1.rotas.autenticacao_api import obter_cliente_autorizado
+from app.api.v1.rotas.autenticacao_api import obter_referencia_cliente_autorizado
 from app.db.models import Cliente
-from app.db.session import get_db
+from app.db.session import get_db, get_db_leitura, get_fabrica_sessao_leitura
 from app.schemas.paginacao_schema import RespostaPaginada
-from app.schemas.produto_favorito_schema import ProdutoFavoritoAdicionar
+from app.schemas.produto_favorito_schema import ProdutoFavoritoAdicionar, ProdutoFavoritoLote, ResultadoLote
 from app.schemas.produto_schema import ProdutoSchema
 from app.services import produto_favorito_servico
 from app.services.api_produtos_servico import ClienteApiProdutos, obter_cliente_api_produtos
@@ -18,24 +19,60 @@ router = APIRouter()
     summary="Listar produtos favoritos de um cliente"
 )
 async def listar_produtos_favoritos(
-    cliente_autorizado: Cliente = Depends(obter_cliente_autorizado),
-    db: AsyncSession = Depends(get_db),
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
+    db: AsyncSession = Depends(get_db_leitura),
+    db_primario: AsyncSession = Depends(get_db),
     cliente_api_produtos: ClienteApiProdutos = Depends(obter_cliente_api_produtos),
     pagina: int = Query(1, ge=1, description="Número da página"),
-    tamanho: int = Query(10, ge=1, le=100, description="Itens por página")
+    tamanho: int = Query(10, ge=1, le=100, description="Itens por página"),
+    cursor: str | None = Query(
+        None,
+        description="Cursor retornado em `proximo_cursor` pela página anterior. Quando informado, `pagina` é ignorada."
+    )
 ):
     """
-    Retorna a lista de produtos favoritos de um cliente.
+    Retorna a lista de produtos favoritos de um cliente, em ordem de inclusão.
     """
-    produtos, total = await produto_favorito_servico.listar_favoritos(
+    produtos, total, proximo_cursor = await produto_favorito_servico.listar_favoritos(
         db=db,
         cliente=cliente_autorizado,
         cliente_api_produtos=cliente_api_produtos,
         pagina=pagina,
-        tamanho=tamanho
+        tamanho=tamanho,
+        cursor=cursor,
+        db_primario=db_primario
     )
-    return RespostaPaginada(itens=produtos, total=total, pagina=pagina, tamanho=tamanho)
+    return RespostaPaginada(
+        itens=produtos,
+        total=total,
+        pagina=pagina if cursor is None else None,
+        tamanho=tamanho,
+        proximo_cursor=proximo_cursor
+    )
+
 
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Exportar todos os produtos favoritos de um cliente em NDJSON"
+)
+async def exportar_produtos_favoritos(
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
+    fabrica_sessao: async_sessionmaker[AsyncSession] = Depends(get_fabrica_sessao_leitura),
+    cliente_api_produtos: ClienteApiProdutos = Depends(obter_cliente_api_produtos)
+):
+    """
+    Retorna a lista completa de produtos favoritos do cliente, um produto JSON por linha,
+    em ordem de inclusão e sem paginação.
+    """
+    return StreamingResponse(
+        produto_favorito_servico.exportar_favoritos(
+            fabrica_sessao=fabrica_sessao,
+            cliente_id=cliente_autorizado.id,
+            cliente_api_produtos=cliente_api_produtos
+        ),
+        media_type="application/x-ndjson"
+    )
 
 @router.post(
     "/",
@@ -44,7 +81,7 @@ async def listar_produtos_favoritos(
 )
 async def adicionar_produto_favorito(
     favorito_a_adicionar: ProdutoFavoritoAdicionar,
-    cliente_autorizado: Cliente = Depends(obter_cliente_autorizado),
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
     db: AsyncSession = Depends(get_db),
     cliente_api_produtos: ClienteApiProdutos = Depends(obter_cliente_api_produtos)
 ):
@@ -59,6 +96,48 @@ async def adicionar_produto_favorito(
     )
     return {"message": "Produto adicionado aos favoritos com sucesso."}
 
+@router.post(
+    "/lote",
+    response_model=ResultadoLote,
+    summary="Adicionar vários produtos aos favoritos do cliente logado"
+)
+async def adicionar_produtos_favoritos_em_lote(
+    lote: ProdutoFavoritoLote,
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
+    db: AsyncSession = Depends(get_db),
+    cliente_api_produtos: ClienteApiProdutos = Depends(obter_cliente_api_produtos)
+):
+    """
+    Adiciona uma lista de produtos aos favoritos do cliente autenticado,
+    informando o resultado de cada produto.
+    """
+    resultados = await produto_favorito_servico.adicionar_favoritos_em_lote(
+        db=db,
+        cliente=cliente_autorizado,
+        produto_ids=lote.produto_ids,
+        cliente_api_produtos=cliente_api_produtos
+    )
+    return ResultadoLote(resultados=resultados)
+
+@router.post(
+    "/lote/remocao",
+    response_model=ResultadoLote,
+    summary="Remover vários produtos dos favoritos do cliente logado"
+)
+async def remover_produtos_favoritos_em_lote(
+    lote: ProdutoFavoritoLote,
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Remove uma lista de produtos dos favoritos do cliente autenticado,
+    informando o resultado de cada produto.
+    """
+    resultados = await produto_favorito_servico.remover_favoritos_em_lote(
+        db=db, cliente=cliente_autorizado, produto_ids=lote.produto_ids
+    )
+    return ResultadoLote(resultados=resultados)
+
 @router.delete(
     "/{produto_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -66,7 +145,7 @@ async def adicionar_produto_favorito(
 )
 async def remover_produto_favorito(
     produto_id: str,
-    cliente_autorizado: Cliente = Depends(obter_cliente_autorizado),
+    cliente_autorizado: Cliente = Depends(obter_referencia_cliente_autorizado),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -0,0 +1,88 @@
+"""
+Comandos de linha de comando para tarefas operacionais da aplicação.
+
+Uso: python -m app.cli <comando> [opções]
+"""
+import argparse
+import asyncio
+
+from app.core.http_client import fechar_http_client
+from app.core.logging_config import setup_logging
+from app.db.session import AsyncSessionLocal
+from app.services import produto_favorito_servico
+from app.services.api_produtos_servico import ClienteApiProdutos
+from app.services.aquecimento_cache_servico import executar_aquecimento_cache
+from app.services.purga_clientes_servico import executar_purga
+
+
+async def _aquecer_cache(args: argparse.Namespace) -> None:
+    await executar_aquecimento_cache(limite=args.limite)
+
+
+async def _invalidar_produtos(args: argparse.Namespace) -> None:
+    await ClienteApiProdutos().invalidar_produtos(args.ids_produtos)
+
+
+async def _reconciliar_contadores(args: argparse.Namespace) -> None:
+    async with AsyncSessionLocal() as db:
+        await produto_favorito_servico.reconciliar_contadores_favoritos(db, tamanho_lote=args.tamanho_lote)
+
+
+async def _purgar_excluidos(args: argparse.Namespace) -> None:
+    await executar_purga(
+        retencao_dias=args.retencao_dias,
+        tamanho_lote=args.tamanho_lote,
+        excluir_clientes=args.excluir_clientes or None,
+    )
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__)
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    aquecer = subparsers.add_parser(
+        "aquecer-cache", help="Pré-carrega no cache os produtos mais favoritados."
+    )
+    aquecer.add_argument("--limite", type=int, default=None, help="Quantidade de produtos a carregar.")
+    aquecer.set_defaults(executar=_aquecer_cache)
+
+    invalidar = subparsers.add_parser(
+        "invalidar-produtos", help="Remove produtos do cache, forçando uma nova consulta à API externa."
+    )
+    invalidar.add_argument("ids_produtos", nargs="+", metavar="ID", help="IDs dos produtos.")
+    invalidar.set_defaults(executar=_invalidar_produtos)
+
+    reconciliar = subparsers.add_parser(
+        "reconciliar-contadores", help="Recalcula o total de favoritos mantido em cada cliente."
+    )
+    reconciliar.add_argument("--tamanho-lote", type=int, default=1000, help="Clientes por transação.")
+    reconciliar.set_defaults(executar=_reconciliar_contadores)
+
+    purgar = subparsers.add_parser(
+        "purgar-excluidos", help="Remove os favoritos de clientes excluídos há mais tempo que a retenção."
+    )
+    purgar.add_argument("--retencao-dias", type=int, default=None, help="Dias desde a exclusão do cliente.")
+    purgar.add_argument("--tamanho-lote", type=int, default=None, help="Linhas removidas por transação.")
+    purgar.add_argument(
+        "--excluir-clientes", action="store_true", help="Remove também os registros dos clientes."
+    )
+    purgar.set_defaults(executar=_purgar_excluidos)
+
+    return parser
+
+
+async def _executar(args: argparse.Namespace) -> None:
+    try:
+        await args.executar(args)
+    finally:
+        await fechar_http_client()
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = criar_parser().parse_args(argv)
+    setup_logging()
+    asyncio.run(_executar(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
 import redis.asyncio as redis
 
 from app.core.config import settings
@@ -7,5 +11,69 @@ redis_pool = redis.ConnectionPool.from_url(
     decode_responses=True
 )
 
+redis_pool_binario = redis.ConnectionPool.from_url(
+    f"redis://{settings.HOST_REDIS}:{settings.PORTA_REDIS}/0",
+)
+
 def get_redis_client() -> redis.Redis:
     return redis.Redis(connection_pool=redis_pool)
+
+def get_redis_client_binario() -> redis.Redis:
+    """Cliente Redis que retorna os valores em bytes, usado para os dados serializados pelos codecs."""
+    return redis.Redis(connection_pool=redis_pool_binario)
+
+
+AUSENTE = object()
+
+class CacheLocal:
+    """
+    Cache em memória, local ao processo, com expiração por tempo (TTL) e
+    descarte do item menos recentemente usado (LRU) ao atingir o tamanho máximo.
+    """
+    def __init__(self, tamanho_maximo: int, ttl_segundos: float):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self._itens: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave: str, padrao: Any = AUSENTE) -> Any:
+        """Retorna o valor em cache para a chave, ou `padrao` se ausente ou expirado."""
+        item = self._itens.get(chave)
+        if item is None:
+            self.misses += 1
+            return padrao
+
+        expira_em, valor = item
+        if expira_em <= time.monotonic():
+            del self._itens[chave]
+            self.misses += 1
+            return padrao
+
+        self._itens.move_to_end(chave)
+        self.hits += 1
+        return valor
+
+    def definir(self, chave: str, valor: Any, ttl_segundos: float | None = None) -> None:
+        """Armazena o valor, descartando o item menos recentemente usado se necessário."""
+        if self.tamanho_maximo <= 0:
+            return
+        ttl = self.ttl_segundos if ttl_segundos is None else ttl_segundos
+        self._itens[chave] = (time.monotonic() + ttl, valor)
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.tamanho_maximo:
+            self._itens.popitem(last=False)
+
+    def remover(self, chave: str) -> None:
+        self._itens.pop(chave, None)
+
+    def limpar(self) -> None:
+        self._itens.clear()
+
+    def estatisticas(self) -> dict[str, int]:
+        return {
+            "itens": len(self._itens),
+            "tamanho_maximo": self.tamanho_maximo,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,120 @@
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import StrEnum
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class EstadoCircuito(StrEnum):
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    SEMI_ABERTO = "semi_aberto"
+
+
+class CircuitoAbertoError(Exception):
+    """Lançada quando uma chamada é rejeitada porque o circuito está aberto."""
+
+
+class CircuitBreaker:
+    """
+    Disjuntor para chamadas a uma dependência externa.
+
+    Após `limite_falhas` falhas consecutivas o circuito abre e as chamadas são
+    rejeitadas imediatamente. Passado o `tempo_recuperacao_segundos`, o circuito fica
+    semiaberto e permite até `max_chamadas_semi_aberto` chamadas de teste: um sucesso
+    fecha o circuito e uma falha o abre novamente.
+    """
+    def __init__(
+        self,
+        nome: str,
+        limite_falhas: int,
+        tempo_recuperacao_segundos: float,
+        max_chamadas_semi_aberto: int = 1,
+    ):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_recuperacao_segundos = tempo_recuperacao_segundos
+        self.max_chamadas_semi_aberto = max_chamadas_semi_aberto
+        self._estado = EstadoCircuito.FECHADO
+        self._falhas_consecutivas = 0
+        self._aberto_em = 0.0
+        self._chamadas_em_teste = 0
+        self.total_falhas = 0
+        self.total_rejeitadas = 0
+
+    @property
+    def estado(self) -> EstadoCircuito:
+        if (
+            self._estado == EstadoCircuito.ABERTO
+            and time.monotonic() - self._aberto_em >= self.tempo_recuperacao_segundos
+        ):
+            self._mudar_estado(EstadoCircuito.SEMI_ABERTO)
+            self._chamadas_em_teste = 0
+        return self._estado
+
+    @asynccontextmanager
+    async def proteger(self) -> AsyncIterator[None]:
+        """
+        Executa o bloco protegido pelo disjuntor. Qualquer exceção lançada no bloco
+        é contabilizada como falha da dependência.
+        """
+        self._autorizar_chamada()
+        try:
+            yield
+        except Exception:
+            self._registrar_falha()
+            raise
+        except BaseException:
+            self._liberar_chamada()
+            raise
+        else:
+            self._registrar_sucesso()
+
+    def _autorizar_chamada(self) -> None:
+        estado = self.estado
+        if estado == EstadoCircuito.ABERTO or (
+            estado == EstadoCircuito.SEMI_ABERTO and self._chamadas_em_teste >= self.max_chamadas_semi_aberto
+        ):
+            self.total_rejeitadas += 1
+            raise CircuitoAbertoError(f"Circuito '{self.nome}' aberto")
+        if estado == EstadoCircuito.SEMI_ABERTO:
+            self._chamadas_em_teste += 1
+
+    def _liberar_chamada(self) -> None:
+        if self._estado == EstadoCircuito.SEMI_ABERTO and self._chamadas_em_teste > 0:
+            self._chamadas_em_teste -= 1
+
+    def _registrar_sucesso(self) -> None:
+        self._liberar_chamada()
+        self._falhas_consecutivas = 0
+        if self._estado != EstadoCircuito.FECHADO:
+            self._mudar_estado(EstadoCircuito.FECHADO)
+
+    def _registrar_falha(self) -> None:
+        self._liberar_chamada()
+        self.total_falhas += 1
+        self._falhas_consecutivas += 1
+        if self._estado == EstadoCircuito.SEMI_ABERTO or self._falhas_consecutivas >= self.limite_falhas:
+            if self._estado != EstadoCircuito.ABERTO:
+                self._mudar_estado(EstadoCircuito.ABERTO)
+            self._aberto_em = time.monotonic()
+
+    def _mudar_estado(self, novo_estado: EstadoCircuito) -> None:
+        logger.warn(
+            "Mudança de estado do circuito",
+            circuito=self.nome,
+            estado_anterior=self._estado.value,
+            novo_estado=novo_estado.value,
+        )
+        self._estado = novo_estado
+
+    def estatisticas(self) -> dict[str, str | int]:
+        return {
+            "estado": self.estado.value,
+            "falhas_consecutivas": self._falhas_consecutivas,
+            "total_falhas": self.total_falhas,
+            "total_rejeitadas": self.total_rejeitadas,
+        }
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,19 +10,87 @@ class Settings(BaseSettings):
     NOME_BD: str
     HOST_BD: str
     PORTA_BD: str
+    HOST_BD_LEITURA: str | None = None
+    PORTA_BD_LEITURA: str | None = None
+    BD_LEITURA_JANELA_CONSISTENCIA_SEGUNDOS: int = 5
+    BD_POOL_TAMANHO: int = 5
+    BD_POOL_MAX_OVERFLOW: int = 10
+    BD_POOL_TIMEOUT_SEGUNDOS: float = 30.0
+    BD_POOL_RECICLAR_SEGUNDOS: int = -1
+    BD_POOL_PRE_PING: bool = False
+    BD_CACHE_STATEMENTS_PREPARADOS: int = 100
+    BD_PGBOUNCER_MODO_TRANSACAO: bool = False
 
     HOST_REDIS: str
     PORTA_REDIS: int
     CACHE_TTL_SEGUNDOS: int
+    CACHE_NEGATIVO_TTL_SEGUNDOS: int = 60
+    CACHE_STALE_SEGUNDOS: int = 600
+    CACHE_FORMATO: str = "json"
+    CACHE_COMPRESSAO_LIMITE_BYTES: int = 1024
+    CACHE_LOCAL_TAMANHO_MAXIMO: int = 1000
+    CACHE_LOCAL_TTL_SEGUNDOS: float = 30.0
+    CACHE_LOCK_DISTRIBUIDO: bool = False
+    CACHE_LOCK_TTL_MS: int = 5000
+    CACHE_LOCK_ESPERA_MS: int = 2000
+    CACHE_LOCK_INTERVALO_MS: int = 50
+    CACHE_AQUECIMENTO_NA_INICIALIZACAO: bool = False
+    CACHE_AQUECIMENTO_LIMITE: int = 500
+    CACHE_AQUECIMENTO_TAMANHO_LOTE: int = 50
+    CACHE_AQUECIMENTO_LOCK_TTL_SEGUNDOS: int = 300
+    FAVORITOS_CACHE_REDIS: bool = False
+    FAVORITOS_CACHE_TTL_SEGUNDOS: int = 3600
+    FAVORITOS_EXPORTACAO_TAMANHO_LOTE: int = 100
+    PURGA_RETENCAO_DIAS: int = 30
+    PURGA_TAMANHO_LOTE: int = 500
+    PURGA_EXCLUIR_CLIENTES: bool = False
+    PURGA_PAUSA_ENTRE_LOTES_MS: int = 100
+    PURGA_PERIODICA: bool = False
+    PURGA_INTERVALO_SEGUNDOS: int = 3600
+    CLIENTE_CACHE_TTL_SEGUNDOS: int = 0
+    CLIENTE_CACHE_LOCAL_TTL_SEGUNDOS: float = 5.0
+    CLIENTE_CACHE_LOCAL_TAMANHO_MAXIMO: int = 1000
 
     TITULO_API: str
+    METRICAS_HABILITADAS: bool = False
+    CHAVE_METRICAS: str | None = None
     URL_BASE_API_PRODUTO: str
+    API_PRODUTO_TIMEOUT_SEGUNDOS: float = 10.0
+    API_PRODUTO_TIMEOUT_CONEXAO_SEGUNDOS: float = 5.0
+    API_PRODUTO_MAX_CONEXOES: int = 100
+    API_PRODUTO_MAX_CONEXOES_KEEPALIVE: int = 20
+    API_PRODUTO_KEEPALIVE_SEGUNDOS: float = 30.0
+    API_PRODUTO_HTTP2: bool = False
+    API_PRODUTO_MAX_CONCORRENCIA: int = 50
+    API_PRODUTO_ESPERA_CONCORRENCIA_SEGUNDOS: float = 5.0
+    CIRCUITO_API_PRODUTO_LIMITE_FALHAS: int = 5
+    CIRCUITO_API_PRODUTO_TEMPO_RECUPERACAO_SEGUNDOS: float = 30.0
+    CIRCUITO_API_PRODUTO_CHAMADAS_SEMI_ABERTO: int = 1
 
     CHAVE_SEGURANCA_JWT: str
     TEMPO_EXPIRACAO_TOKEN_MINUTOS: int
+    TEMPO_EXPIRACAO_TOKEN_ATUALIZACAO_DIAS: int = 7
+    AUTORIZACAO_SEM_CONSULTA_BD: bool = False
+    JWT_CACHE_TAMANHO_MAXIMO: int = 10000
+    SENHA_HASH_MAX_THREADS: int = 4
+    SENHA_HASH_ESQUEMA: Literal["bcrypt", "argon2", "pbkdf2_sha256"] = "bcrypt"
+    SENHA_HASH_CUSTO: int | None = None
+    SENHA_HASH_ARGON2_MEMORIA_KB: int | None = None
+    LOGIN_LIMITE_HABILITADO: bool = True
+    LOGIN_LIMITE_POR_USUARIO: int = 5
+    LOGIN_LIMITE_POR_IP: int = 20
+    LOGIN_JANELA_SEGUNDOS: int = 60
+    LOGIN_CABECALHO_IP_CLIENTE: str | None = None
 
     @property
     def url_bd(self) -> str:
         return f"postgresql+asyncpg://{self.USUARIO_BD}:{self.SENHA_BD}@{self.HOST_BD}:{self.PORTA_BD}/{self.NOME_BD}"
 
+    @property
+    def url_bd_leitura(self) -> str | None:
+        if not self.HOST_BD_LEITURA:
+            return None
+        porta = self.PORTA_BD_LEITURA or self.PORTA_BD
+        return f"postgresql+asyncpg://{self.USUARIO_BD}:{self.SENHA_BD}@{self.HOST_BD_LEITURA}:{porta}/{self.NOME_BD}"
+
 settings = Settings()
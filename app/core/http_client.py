@@ -0,0 +1,40 @@
+import httpx
+
+from app.core.config import settings
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def criar_http_client() -> httpx.AsyncClient:
+    """
+    Cria um cliente HTTP com pool de conexões (keep-alive) para a API externa de produtos.
+    HTTP/2 só é habilitado se configurado, pois depende do pacote opcional `h2`.
+    """
+    return httpx.AsyncClient(
+        http2=settings.API_PRODUTO_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.API_PRODUTO_MAX_CONEXOES,
+            max_keepalive_connections=settings.API_PRODUTO_MAX_CONEXOES_KEEPALIVE,
+            keepalive_expiry=settings.API_PRODUTO_KEEPALIVE_SEGUNDOS,
+        ),
+        timeout=httpx.Timeout(
+            settings.API_PRODUTO_TIMEOUT_SEGUNDOS,
+            connect=settings.API_PRODUTO_TIMEOUT_CONEXAO_SEGUNDOS,
+        ),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Retorna o cliente HTTP compartilhado do processo, criando-o caso ainda não exista.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = criar_http_client()
+    return _http_client
+
+async def fechar_http_client() -> None:
+    """Encerra o cliente HTTP compartilhado, liberando as conexões do pool."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
@@ -0,0 +1,80 @@
+import math
+import time
+import uuid
+
+import redis.asyncio as redis
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Janela deslizante em um sorted set por chave (pontuação = instante da tentativa, em ms).
+# Todas as chaves são verificadas e, só se nenhuma tiver atingido o limite, a tentativa
+# é registrada em todas, de forma atômica. Retorna 0 ou os milissegundos até a próxima vaga.
+_SCRIPT_JANELA_DESLIZANTE = """
+local agora = tonumber(ARGV[1])
+local janela = tonumber(ARGV[2])
+local membro = ARGV[3]
+local espera = 0
+for i, chave in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', chave, '-inf', agora - janela)
+    if redis.call('ZCARD', chave) >= tonumber(ARGV[3 + i]) then
+        local mais_antiga = redis.call('ZRANGE', chave, 0, 0, 'WITHSCORES')
+        espera = math.max(espera, tonumber(mais_antiga[2]) + janela - agora)
+    end
+end
+if espera > 0 then
+    return espera
+end
+for _, chave in ipairs(KEYS) do
+    redis.call('ZADD', chave, agora, membro)
+    redis.call('PEXPIRE', chave, janela)
+end
+return 0
+"""
+
+
+class LimitadorTaxa:
+    """
+    Limitador de tentativas por janela deslizante, compartilhado entre workers via Redis.
+
+    Cada chamada a `consumir` verifica vários identificadores (por exemplo, usuário e IP),
+    cada um com o seu limite de tentativas por `janela_segundos`. Se o Redis estiver
+    indisponível, a tentativa é permitida (fail open).
+    """
+    def __init__(self, nome: str, janela_segundos: float):
+        self.nome = nome
+        self.janela_ms = int(janela_segundos * 1000)
+
+    def _chave(self, identificador: str) -> str:
+        return f"limite:{self.nome}:{identificador}"
+
+    async def consumir(self, redis_client: redis.Redis, limites: dict[str, int]) -> float:
+        """
+        Registra uma tentativa para os identificadores informados (identificador -> limite).
+        Retorna 0 se ela foi permitida, ou os segundos até que uma nova tentativa seja aceita.
+        """
+        if not limites:
+            return 0
+        chaves = [self._chave(identificador) for identificador in limites]
+        agora_ms = int(time.time() * 1000)
+        try:
+            espera_ms = await redis_client.eval(
+                _SCRIPT_JANELA_DESLIZANTE,
+                len(chaves),
+                *chaves,
+                agora_ms,
+                self.janela_ms,
+                uuid.uuid4().hex,
+                *limites.values(),
+            )
+        except Exception:
+            logger.error("Erro ao consultar o limitador de taxa no Redis", limitador=self.nome, exc_info=True)
+            return 0
+        return math.ceil(int(espera_ms) / 1000) if espera_ms else 0
+
+    async def liberar(self, redis_client: redis.Redis, identificador: str) -> None:
+        """Descarta as tentativas registradas para o identificador."""
+        try:
+            await redis_client.delete(self._chave(identificador))
+        except Exception:
+            logger.error("Erro ao liberar o limitador de taxa no Redis", limitador=self.nome, exc_info=True)
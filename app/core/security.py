@@ -1,22 +1,185 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
 
 from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTError
 from passlib.context import CryptContext
 
+from app.core.cache import AUSENTE, CacheLocal
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Esquema com que as senhas foram geradas originalmente; continua aceito na verificação
+# mesmo que outro esquema seja configurado, e os hashes são migrados no próximo login.
+ESQUEMA_HASH_LEGADO = "bcrypt"
+
+def criar_contexto_senhas(esquema: str, custo: int | None = None, argon2_memoria_kb: int | None = None) -> CryptContext:
+    """
+    Cria o contexto de hash de senhas com o esquema e o custo informados.
+    Com um custo definido, hashes gerados com outro custo (maior ou menor) são marcados para
+    atualização, assim como hashes de esquemas que não sejam o configurado.
+    """
+    opcoes = {}
+    if custo is not None:
+        opcoes.update({
+            f"{esquema}__default_rounds": custo,
+            f"{esquema}__min_rounds": custo,
+            f"{esquema}__max_rounds": custo,
+        })
+    if esquema == "argon2" and argon2_memoria_kb is not None:
+        opcoes["argon2__memory_cost"] = argon2_memoria_kb
+    esquemas = list(dict.fromkeys([esquema, ESQUEMA_HASH_LEGADO]))
+    return CryptContext(schemes=esquemas, default=esquema, deprecated="auto", **opcoes)
+
+pwd_context = criar_contexto_senhas(
+    settings.SENHA_HASH_ESQUEMA,
+    custo=settings.SENHA_HASH_CUSTO,
+    argon2_memoria_kb=settings.SENHA_HASH_ARGON2_MEMORIA_KB,
+)
 ALGORITHM = "HS256"
 
+_executor_senhas: ThreadPoolExecutor | None = None
+
+cache_tokens_verificados = CacheLocal(
+    tamanho_maximo=settings.JWT_CACHE_TAMANHO_MAXIMO,
+    ttl_segundos=settings.TEMPO_EXPIRACAO_TOKEN_MINUTOS * 60,
+)
+
 def verificar_senha(senha: str, hash_senha: str) -> bool:
     """Verifica se a senha corresponde ao hash da senha."""
     return pwd_context.verify(senha, hash_senha)
 
+def verificar_e_atualizar_senha(senha: str, hash_senha: str) -> tuple[bool, str | None]:
+    """
+    Verifica a senha e, se ela for válida e o hash estiver desatualizado (esquema ou custo
+    diferentes dos configurados), retorna também um novo hash para substituí-lo.
+    """
+    return pwd_context.verify_and_update(senha, hash_senha)
+
 def gerar_hash_senha(senha: str) -> str:
     """Gera o hash de uma senha."""
     return pwd_context.hash(senha)
 
-def gerar_token(subject: str):
-    """Cria um novo token de acesso JWT."""
+def get_executor_senhas() -> ThreadPoolExecutor:
+    """
+    Retorna o pool de threads do processo usado para o hash e a verificação de senhas,
+    criando-o caso ainda não exista. O bcrypt libera o GIL, então as threads rodam em paralelo
+    sem bloquear o event loop.
+    """
+    global _executor_senhas
+    if _executor_senhas is None:
+        _executor_senhas = ThreadPoolExecutor(
+            max_workers=settings.SENHA_HASH_MAX_THREADS,
+            thread_name_prefix="hash-senha",
+        )
+    return _executor_senhas
+
+def encerrar_executor_senhas() -> None:
+    """Encerra o pool de threads de senhas, aguardando as operações em andamento."""
+    global _executor_senhas
+    if _executor_senhas is not None:
+        _executor_senhas.shutdown(wait=True)
+        _executor_senhas = None
+
+async def verificar_senha_async(senha: str, hash_senha: str) -> bool:
+    """Como `verificar_senha`, mas executada no pool de threads de senhas, fora do event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor_senhas(), verificar_senha, senha, hash_senha)
+
+async def verificar_e_atualizar_senha_async(senha: str, hash_senha: str) -> tuple[bool, str | None]:
+    """Como `verificar_e_atualizar_senha`, mas executada no pool de threads de senhas, fora do event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor_senhas(), verificar_e_atualizar_senha, senha, hash_senha)
+
+async def gerar_hash_senha_async(senha: str) -> str:
+    """Como `gerar_hash_senha`, mas executada no pool de threads de senhas, fora do event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor_senhas(), gerar_hash_senha, senha)
+
+TIPO_TOKEN_ACESSO = "access"
+TIPO_TOKEN_ATUALIZACAO = "refresh"
+
+def gerar_token(subject: str, versao: int = 0):
+    """
+    Cria um novo token de acesso JWT, de curta duração. `versao` é a versão de token do
+    cliente no momento da emissão, usada para revogar os tokens já emitidos.
+    """
     expire = datetime.now(UTC) + timedelta(minutes=settings.TEMPO_EXPIRACAO_TOKEN_MINUTOS)
-    return jwt.encode({"sub": subject, "exp": expire}, settings.CHAVE_SEGURANCA_JWT, algorithm=ALGORITHM)
+    return jwt.encode(
+        {"sub": subject, "exp": expire, "ver": versao, "typ": TIPO_TOKEN_ACESSO},
+        settings.CHAVE_SEGURANCA_JWT,
+        algorithm=ALGORITHM
+    )
+
+def gerar_token_atualizacao(subject: str, versao: int = 0):
+    """Cria um token de atualização (refresh token) JWT, de longa duração, para obter novos tokens de acesso."""
+    expire = datetime.now(UTC) + timedelta(days=settings.TEMPO_EXPIRACAO_TOKEN_ATUALIZACAO_DIAS)
+    return jwt.encode(
+        {"sub": subject, "exp": expire, "ver": versao, "typ": TIPO_TOKEN_ATUALIZACAO},
+        settings.CHAVE_SEGURANCA_JWT,
+        algorithm=ALGORITHM
+    )
+
+@lru_cache(maxsize=4)
+def _hmac_preparado(chave: str) -> "hmac.HMAC":
+    """HMAC-SHA256 já inicializado com a chave; cada verificação usa uma cópia dele."""
+    return hmac.new(chave.encode("utf-8"), digestmod=hashlib.sha256)
+
+def _decodificar_base64url(segmento: str) -> bytes:
+    return base64.urlsafe_b64decode(segmento + "=" * (-len(segmento) % 4))
+
+def verificar_token(token: str) -> dict:
+    """
+    Verifica um token JWT HS256 emitido por `gerar_token` e retorna o seu payload.
+
+    Equivale a `jwt.decode(token, CHAVE_SEGURANCA_JWT, algorithms=[ALGORITHM])` para esses tokens,
+    mas com a chave HMAC preparada uma única vez, e guarda os tokens já verificados em um cache
+    em memória até o seu `exp`. Lança `JWTError` (ou `ExpiredSignatureError`) se o token for inválido.
+    """
+    payload = cache_tokens_verificados.obter(token)
+    if payload is not AUSENTE:
+        return payload
+
+    try:
+        cabecalho_b64, payload_b64, assinatura_b64 = token.split(".")
+        cabecalho = json.loads(_decodificar_base64url(cabecalho_b64))
+        assinatura = _decodificar_base64url(assinatura_b64)
+    except ValueError as err:
+        raise JWTError("Token malformado.") from err
+    if not isinstance(cabecalho, dict) or cabecalho.get("alg") != ALGORITHM:
+        raise JWTError("Algoritmo do token não permitido.")
+
+    mac = _hmac_preparado(settings.CHAVE_SEGURANCA_JWT).copy()
+    try:
+        mac.update(f"{cabecalho_b64}.{payload_b64}".encode("ascii"))
+        assinatura_valida = hmac.compare_digest(mac.digest(), assinatura)
+    except (UnicodeError, ValueError) as err:
+        raise JWTError("Token malformado.") from err
+    if not assinatura_valida:
+        raise JWTError("Assinatura do token inválida.")
+
+    try:
+        payload = json.loads(_decodificar_base64url(payload_b64))
+    except ValueError as err:
+        raise JWTError("Payload do token inválido.") from err
+    if not isinstance(payload, dict):
+        raise JWTError("Payload do token inválido.")
+
+    agora = time.time()
+    expiracao = payload.get("exp")
+    if not isinstance(expiracao, int | float):
+        raise JWTError("Token sem expiração válida.")
+    if expiracao <= agora:
+        raise ExpiredSignatureError("O token expirou.")
+    inicio_validade = payload.get("nbf")
+    if inicio_validade is not None and (not isinstance(inicio_validade, int | float) or inicio_validade > agora):
+        raise JWTError("O token ainda não é válido.")
+
+    cache_tokens_verificados.definir(token, payload, ttl_segundos=expiracao - agora)
+    return payload
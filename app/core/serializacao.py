@@ -0,0 +1,86 @@
+import json
+import zlib
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependência opcional
+    msgpack = None
+
+FLAG_COMPRIMIDO = 0x01
+
+def _json_dumps(valor: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(valor)
+    return json.dumps(valor, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _json_loads(dados: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(dados)
+    return json.loads(dados)
+
+def _msgpack_dumps(valor: Any) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("O formato 'msgpack' requer o pacote opcional `msgpack`.")
+    return msgpack.packb(valor, use_bin_type=True)
+
+def _msgpack_loads(dados: bytes) -> Any:
+    if msgpack is None:
+        raise RuntimeError("O formato 'msgpack' requer o pacote opcional `msgpack`.")
+    return msgpack.unpackb(dados, raw=False)
+
+# Identificador gravado no primeiro byte de cada valor. Novos formatos devem receber
+# um identificador novo para que valores antigos continuem legíveis sem limpar o cache.
+FORMATOS: dict[str, tuple[int, Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "json": (1, _json_dumps, _json_loads),
+    "msgpack": (2, _msgpack_dumps, _msgpack_loads),
+}
+_FORMATOS_POR_ID = {id_formato: (dumps, loads) for id_formato, dumps, loads in FORMATOS.values()}
+
+
+class CodecCache:
+    """
+    Serializa valores para armazenamento em cache no formato `<formato><flags><conteúdo>`,
+    comprimindo com zlib o conteúdo maior que `limite_compressao_bytes` (0 desabilita).
+
+    A leitura identifica o formato pelo prefixo, de modo que é possível trocar o formato
+    de gravação sem invalidar o cache. Valores sem prefixo (JSON em texto, gravados antes
+    da introdução dos codecs) continuam sendo lidos.
+    """
+    def __init__(self, formato: str = "json", limite_compressao_bytes: int = 0):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de cache desconhecido: {formato}")
+        self.formato = formato
+        self.limite_compressao_bytes = limite_compressao_bytes
+        self._id_formato, self._dumps, _ = FORMATOS[formato]
+        # Valida na inicialização que a dependência opcional do formato está instalada.
+        self._dumps(None)
+
+    def codificar(self, valor: Any) -> bytes:
+        conteudo = self._dumps(valor)
+        flags = 0
+        if 0 < self.limite_compressao_bytes < len(conteudo):
+            conteudo = zlib.compress(conteudo)
+            flags |= FLAG_COMPRIMIDO
+        return bytes((self._id_formato, flags)) + conteudo
+
+    def decodificar(self, dados: bytes | str) -> Any:
+        if isinstance(dados, str):
+            dados = dados.encode("utf-8")
+        if dados[:1] in (b"{", b"["):
+            return json.loads(dados)
+
+        id_formato, flags = dados[0], dados[1]
+        if id_formato not in _FORMATOS_POR_ID:
+            raise ValueError(f"Formato de cache desconhecido: {id_formato}")
+        _, loads = _FORMATOS_POR_ID[id_formato]
+        conteudo = dados[2:]
+        if flags & FLAG_COMPRIMIDO:
+            conteudo = zlib.decompress(conteudo)
+        return loads(conteudo)
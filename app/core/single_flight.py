@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+
+import redis.asyncio as redis
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+_SCRIPT_LIBERAR_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Agrupa execuções concorrentes de uma mesma operação, identificada por uma chave,
+    para que apenas uma seja de fato executada e o resultado seja compartilhado.
+    """
+    def __init__(self):
+        self._em_andamento: dict[str, asyncio.Future] = {}
+
+    async def executar[T](self, chave: str, funcao: Callable[[], Awaitable[T]]) -> T:
+        futuro = self._em_andamento.get(chave)
+        if futuro is None:
+            futuro = asyncio.ensure_future(funcao())
+            self._em_andamento[chave] = futuro
+            futuro.add_done_callback(lambda _: self._descartar(chave, futuro))
+        # O shield impede que o cancelamento de um dos chamadores cancele a execução compartilhada.
+        return await asyncio.shield(futuro)
+
+    def _descartar(self, chave: str, futuro: asyncio.Future) -> None:
+        if self._em_andamento.get(chave) is futuro:
+            del self._em_andamento[chave]
+
+    def __len__(self) -> int:
+        return len(self._em_andamento)
+
+
+@asynccontextmanager
+async def lock_distribuido(redis_client: redis.Redis, chave: str, ttl_ms: int) -> AsyncIterator[bool]:
+    """
+    Tenta adquirir um lock no Redis (SET NX PX), indicando se ele foi obtido.
+    Se o Redis estiver indisponível, considera o lock adquirido para não bloquear o chamador.
+    """
+    token = uuid.uuid4().hex
+    try:
+        adquirido = bool(await redis_client.set(chave, token, nx=True, px=ttl_ms))
+    except Exception:
+        logger.error("Erro ao adquirir lock no Redis", chave=chave, exc_info=True)
+        yield True
+        return
+
+    try:
+        yield adquirido
+    finally:
+        if adquirido:
+            try:
+                await redis_client.eval(_SCRIPT_LIBERAR_LOCK, 1, chave, token)
+            except Exception:
+                logger.error("Erro ao liberar lock no Redis", chave=chave, exc_info=True)
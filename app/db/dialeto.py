@@ -0,0 +1,19 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_INSERTS_POR_DIALETO = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def insert_do_dialeto(db: AsyncSession, modelo):
+    """
+    Cria um INSERT específico do dialeto do banco ligado à sessão, que expõe
+    `on_conflict_do_nothing`/`on_conflict_do_update` (Postgres em produção, SQLite nos testes).
+    """
+    nome_dialeto = db.get_bind().dialect.name
+    try:
+        insert = _INSERTS_POR_DIALETO[nome_dialeto]
+    except KeyError as err:
+        raise NotImplementedError(f"Dialeto de banco não suportado para upsert: {nome_dialeto}") from err
+    return insert(modelo)
@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Index, String, UniqueConstraint, func
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import declarative_base
 
@@ -13,6 +13,8 @@ class Cliente(Base):
     nome = Column(String(100), nullable=False)
     email = Column(String(100), index=True, nullable=False)
     hash_senha = Column(String, nullable=False)
+    total_favoritos = Column(Integer, server_default="0", nullable=False)
+    versao_token = Column(Integer, server_default="0", nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -34,5 +36,9 @@ class ProdutoFavorito(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     cliente_id = Column(UUID(as_uuid=True), ForeignKey('cliente.id', ondelete='CASCADE'), nullable=False)
     produto_id = Column(String, index=True, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
 
-    __table_args__ = (UniqueConstraint('cliente_id', 'produto_id', name='_cliente_produto_uc'),)
+    __table_args__ = (
+        UniqueConstraint('cliente_id', 'produto_id', name='_cliente_produto_uc'),
+        Index('ix_produto_favorito_cliente_id_created_at', cliente_id, created_at, produto_id),
+    )
@@ -0,0 +1,45 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMonitorado(AsyncAdaptedQueuePool):
+    """
+    Pool de conexões do SQLAlchemy que, além do comportamento padrão, mede quanto tempo
+    as requisições esperam para obter uma conexão e quantas vezes essa espera estourou o timeout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.total_obtencoes = 0
+        self.total_timeouts = 0
+        self.tempo_espera_total_segundos = 0.0
+        self.tempo_espera_maximo_segundos = 0.0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.total_timeouts += 1
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            self.total_obtencoes += 1
+            self.tempo_espera_total_segundos += espera
+            self.tempo_espera_maximo_segundos = max(self.tempo_espera_maximo_segundos, espera)
+
+    def estatisticas(self) -> dict:
+        return {
+            "tamanho": self.size(),
+            "conexoes_em_uso": self.checkedout(),
+            "conexoes_disponiveis": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "total_obtencoes": self.total_obtencoes,
+            "total_timeouts": self.total_timeouts,
+            "tempo_espera_medio_ms": round(
+                self.tempo_espera_total_segundos * 1000 / self.total_obtencoes, 3
+            ) if self.total_obtencoes else 0.0,
+            "tempo_espera_maximo_ms": round(self.tempo_espera_maximo_segundos * 1000, 3),
+        }
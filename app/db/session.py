@@ -1,13 +1,46 @@
 import typing
+import uuid
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import structlog
+from fastapi import Depends, Request
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
+from app.core.cache import get_redis_client
 from app.core.config import settings
+from app.db.pool import PoolMonitorado
 
-async_engine = create_async_engine(
-    settings.url_bd,
-    echo=False,
-)
+logger = structlog.get_logger(__name__)
+
+def _argumentos_conexao() -> dict:
+    """
+    Argumentos repassados ao asyncpg. Com PgBouncer em modo transação, statements preparados
+    não podem ser reaproveitados entre transações nem ter nomes repetidos, pois a conexão do
+    servidor muda a cada transação; os caches são desabilitados e cada statement recebe um nome único.
+    """
+    if settings.BD_PGBOUNCER_MODO_TRANSACAO:
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {"prepared_statement_cache_size": settings.BD_CACHE_STATEMENTS_PREPARADOS}
+
+def _criar_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=PoolMonitorado,
+        pool_size=settings.BD_POOL_TAMANHO,
+        max_overflow=settings.BD_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.BD_POOL_TIMEOUT_SEGUNDOS,
+        pool_recycle=settings.BD_POOL_RECICLAR_SEGUNDOS,
+        pool_pre_ping=settings.BD_POOL_PRE_PING,
+        connect_args=_argumentos_conexao(),
+    )
+
+async_engine = _criar_engine(settings.url_bd)
+async_engine_leitura = _criar_engine(settings.url_bd_leitura) if settings.url_bd_leitura else None
 
 AsyncSessionLocal = async_sessionmaker(
     bind=async_engine,
@@ -15,9 +48,83 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+AsyncSessionLeitura = async_sessionmaker(
+    bind=async_engine_leitura,
+    class_=AsyncSession,
+    expire_on_commit=False,
+) if async_engine_leitura is not None else None
+
 async def get_db() -> typing.AsyncGenerator[AsyncSession]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+async def get_db_leitura(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> typing.AsyncGenerator[AsyncSession]:
+    """
+    Sessão para rotas somente leitura, ligada à réplica de leitura quando configurada.
+    Sem réplica, ou quando o cliente do caminho (`{id}`) alterou dados há pouco, reutiliza a
+    sessão do primário da requisição, para que o cliente sempre leia as próprias escritas.
+    """
+    if not await _usar_replica(request):
+        yield db
+        return
+
+    async with AsyncSessionLeitura() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+async def get_fabrica_sessao_leitura(request: Request) -> async_sessionmaker[AsyncSession]:
+    """
+    Fábrica de sessões de leitura, para quem precisa abrir a própria sessão fora do ciclo das
+    dependências, como respostas em streaming. Escolhe entre réplica e primário como `get_db_leitura`.
+    """
+    return AsyncSessionLeitura if await _usar_replica(request) else AsyncSessionLocal
+
+async def _usar_replica(request: Request) -> bool:
+    """
+    Indica se a leitura pode ir à réplica: ela precisa estar configurada e o cliente
+    do caminho (`{id}`), se houver, não pode ter alterado dados há pouco.
+    """
+    if AsyncSessionLeitura is None:
+        return False
+    cliente_id = request.path_params.get("id")
+    return cliente_id is None or not await _teve_escrita_recente(cliente_id)
+
+def _chave_escrita_recente(cliente_id) -> str:
+    return f"escrita_recente:{cliente_id}"
+
+async def marcar_escrita_recente(cliente_id) -> None:
+    """
+    Registra que o cliente acabou de alterar dados, direcionando suas leituras ao primário
+    durante `BD_LEITURA_JANELA_CONSISTENCIA_SEGUNDOS`. Sem réplica configurada, não faz nada.
+    """
+    if AsyncSessionLeitura is None:
+        return
+    try:
+        await get_redis_client().set(
+            _chave_escrita_recente(cliente_id), 1, ex=settings.BD_LEITURA_JANELA_CONSISTENCIA_SEGUNDOS
+        )
+    except RedisError:
+        logger.warn("Falha ao registrar escrita recente do cliente no Redis", cliente_id=str(cliente_id))
+
+async def _teve_escrita_recente(cliente_id) -> bool:
+    try:
+        return bool(await get_redis_client().exists(_chave_escrita_recente(cliente_id)))
+    except RedisError:
+        logger.warn("Falha ao consultar escrita recente no Redis; usando o primário", cliente_id=str(cliente_id))
+        return True
+
+def estatisticas_pool() -> dict:
+    """Retorna a ocupação e o tempo de espera do pool de conexões com o banco neste worker."""
+    return async_engine.pool.estatisticas()
+
+def estatisticas_pool_leitura() -> dict | None:
+    """Como `estatisticas_pool`, para a réplica de leitura, ou None se ela não estiver configurada."""
+    return async_engine_leitura.pool.estatisticas() if async_engine_leitura is not None else None
@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 
 import structlog
@@ -6,15 +8,33 @@ from fastapi import FastAPI
 from app.api.middlewares import RequestIDMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.http_client import fechar_http_client, get_http_client
 from app.core.logging_config import setup_logging
+from app.core.security import encerrar_executor_senhas
+from app.services.aquecimento_cache_servico import executar_aquecimento_cache_na_inicializacao
+from app.services.purga_clientes_servico import executar_purga_periodica
 
 setup_logging()
 logger = structlog.get_logger("uvicorn.access")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    get_http_client()
+    tarefa_aquecimento = None
+    if settings.CACHE_AQUECIMENTO_NA_INICIALIZACAO:
+        tarefa_aquecimento = asyncio.create_task(executar_aquecimento_cache_na_inicializacao())
+    tarefa_purga = None
+    if settings.PURGA_PERIODICA:
+        tarefa_purga = asyncio.create_task(executar_purga_periodica())
     logger.info("Aplicação iniciada.", title=app.title, version=getattr(app, "version", "N/A"))
     yield
+    for tarefa in (tarefa_aquecimento, tarefa_purga):
+        if tarefa is not None:
+            tarefa.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await tarefa
+    await fechar_http_client()
+    encerrar_executor_senhas()
     logger.info("Aplicação encerrada.")
 
 app = FastAPI(title=settings.TITULO_API, lifespan=lifespan)
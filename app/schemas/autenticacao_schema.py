@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class TokenAtualizar(BaseModel):
+    refresh_token: str
+
+class Tokens(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
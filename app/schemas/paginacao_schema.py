@@ -7,5 +7,6 @@ T = TypeVar('T')
 class RespostaPaginada[T](BaseModel):
     itens: list[T]
     total: int
-    pagina: int
+    pagina: int | None = None
     tamanho: int
+    proximo_cursor: str | None = None
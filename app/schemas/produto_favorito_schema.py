@@ -1,5 +1,26 @@
-from pydantic import BaseModel
+from enum import StrEnum
+
+from pydantic import BaseModel, Field
+
+TAMANHO_MAXIMO_LOTE = 100
 
 
 class ProdutoFavoritoAdicionar(BaseModel):
     produto_id: str
+
+class ProdutoFavoritoLote(BaseModel):
+    produto_ids: list[str] = Field(min_length=1, max_length=TAMANHO_MAXIMO_LOTE)
+
+class SituacaoItemLote(StrEnum):
+    ADICIONADO = "adicionado"
+    JA_FAVORITO = "ja_favorito"
+    REMOVIDO = "removido"
+    NAO_FAVORITO = "nao_favorito"
+    PRODUTO_NAO_ENCONTRADO = "produto_nao_encontrado"
+
+class ResultadoItemLote(BaseModel):
+    produto_id: str
+    situacao: SituacaoItemLote
+
+class ResultadoLote(BaseModel):
+    resultados: list[ResultadoItemLote]
@@ -1,78 +1,342 @@
-import json
+import asyncio
 import time
+from collections.abc import Sequence
 from typing import Any
 
 import httpx
 import structlog
 from fastapi import HTTPException, status
 
-from app.core.cache import get_redis_client
+from app.core.cache import AUSENTE, CacheLocal, get_redis_client_binario
+from app.core.circuit_breaker import CircuitBreaker, CircuitoAbertoError
 from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.serializacao import CodecCache
+from app.core.single_flight import SingleFlight, lock_distribuido
 
 logger = structlog.get_logger(__name__)
 
+cache_local_produtos = CacheLocal(
+    tamanho_maximo=settings.CACHE_LOCAL_TAMANHO_MAXIMO,
+    ttl_segundos=settings.CACHE_LOCAL_TTL_SEGUNDOS,
+)
+codec_cache_produtos = CodecCache(
+    formato=settings.CACHE_FORMATO,
+    limite_compressao_bytes=settings.CACHE_COMPRESSAO_LIMITE_BYTES,
+)
+buscas_em_andamento = SingleFlight()
+_tarefas_revalidacao: set[asyncio.Task] = set()
+limite_chamadas_api = asyncio.Semaphore(settings.API_PRODUTO_MAX_CONCORRENCIA)
+circuito_api_produtos = CircuitBreaker(
+    nome="api_produtos",
+    limite_falhas=settings.CIRCUITO_API_PRODUTO_LIMITE_FALHAS,
+    tempo_recuperacao_segundos=settings.CIRCUITO_API_PRODUTO_TEMPO_RECUPERACAO_SEGUNDOS,
+    max_chamadas_semi_aberto=settings.CIRCUITO_API_PRODUTO_CHAMADAS_SEMI_ABERTO,
+)
+
 class ClienteApiProdutos:
     """
     Cliente para interagir com a API externa de produtos.
     """
-    def __init__(self):
+    def __init__(self, http_client: httpx.AsyncClient | None = None):
         self.url_base = f"{settings.URL_BASE_API_PRODUTO}/products"
-        self.redis_client = get_redis_client()
+        self.redis_client = get_redis_client_binario()
+        self._http_client = http_client
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP com pool de conexões compartilhado pelo processo."""
+        return self._http_client or get_http_client()
+
+    @staticmethod
+    def _chave_cache(id_produto: str) -> str:
+        return f"product:{id_produto}"
+
+    @staticmethod
+    def _chave_cache_negativo(id_produto: str) -> str:
+        """Chave que registra, com TTL próprio, que o produto não existe na API externa."""
+        return f"product_not_found:{id_produto}"
 
     async def obter_detalhes_produto(self, id_produto: str) -> dict[str, Any] | None:
         """
         Busca os detalhes de um produto específico na API externa.
         Para melhorar a performance, busca primeiro em um cache Redis
         """
-        cache_key = f"product:{id_produto}"
+        produtos = await self.obter_detalhes_produtos([id_produto])
+        return produtos[0]
+
+    async def obter_detalhes_produtos(self, ids_produtos: Sequence[str]) -> list[dict[str, Any] | None]:
+        """
+        Busca os detalhes de vários produtos, na mesma ordem dos IDs informados.
+        Os produtos são procurados primeiro no cache local do processo e depois no Redis,
+        com um único MGET; apenas os ausentes são buscados na API externa e gravados de
+        volta no cache em um único pipeline. Produtos inexistentes também ficam em cache,
+        por um tempo menor, e são retornados como None.
+
+        Entradas do Redis que passaram do `CACHE_TTL_SEGUNDOS`, mas ainda estão dentro da
+        janela `CACHE_STALE_SEGUNDOS`, são retornadas imediatamente e atualizadas em segundo plano.
+        """
+        if not ids_produtos:
+            return []
+
+        ids_unicos = list(dict.fromkeys(ids_produtos))
+        produtos = self._buscar_no_cache_local(ids_unicos)
+        total_cache_local = len(produtos)
+
+        ids_fora_cache_local = [id_produto for id_produto in ids_unicos if id_produto not in produtos]
+        if ids_fora_cache_local:
+            produtos_em_cache, ids_desatualizados = await self._buscar_no_cache(ids_fora_cache_local)
+            self._salvar_no_cache_local(produtos_em_cache)
+            produtos.update(produtos_em_cache)
+            self._revalidar_em_segundo_plano(ids_desatualizados)
+
+        ids_ausentes = [id_produto for id_produto in ids_unicos if id_produto not in produtos]
+        logger.info(
+            "Consulta de produtos no cache concluída",
+            total=len(ids_unicos),
+            cache_local_hits=total_cache_local,
+            cache_hits=len(produtos) - total_cache_local,
+            cache_misses=len(ids_ausentes),
+        )
+
+        if ids_ausentes:
+            resultados = await asyncio.gather(
+                *(self._buscar_produto_ausente(id_produto) for id_produto in ids_ausentes)
+            )
+            buscados = dict(zip(ids_ausentes, resultados, strict=True))
+            produtos.update(buscados)
+            self._salvar_no_cache_local(buscados)
+            # Com o lock distribuído, cada produto já é gravado no Redis por quem o buscou.
+            if not settings.CACHE_LOCK_DISTRIBUIDO:
+                await self._salvar_no_cache(buscados)
+
+        return [produtos[id_produto] for id_produto in ids_produtos]
+
+    def _buscar_no_cache_local(self, ids_produtos: list[str]) -> dict[str, dict[str, Any] | None]:
+        """Busca no cache em memória do processo os produtos já conhecidos."""
+        produtos = {}
+        for id_produto in ids_produtos:
+            produto = cache_local_produtos.obter(self._chave_cache(id_produto))
+            if produto is not AUSENTE:
+                produtos[id_produto] = produto
+        return produtos
+
+    def _salvar_no_cache_local(self, produtos: dict[str, dict[str, Any] | None]) -> None:
+        ttl_negativo = min(settings.CACHE_LOCAL_TTL_SEGUNDOS, settings.CACHE_NEGATIVO_TTL_SEGUNDOS)
+        for id_produto, dados_produto in produtos.items():
+            cache_local_produtos.definir(
+                self._chave_cache(id_produto),
+                dados_produto,
+                ttl_segundos=None if dados_produto is not None else ttl_negativo,
+            )
+
+    async def _buscar_no_cache(
+        self, ids_produtos: list[str]
+    ) -> tuple[dict[str, dict[str, Any] | None], list[str]]:
+        """
+        Busca no Redis, com um único MGET, os produtos já armazenados em cache,
+        incluindo os registrados como inexistentes (retornados como None).
+        Retorna também os IDs cujas entradas já passaram do TTL e devem ser atualizadas.
+        """
+        chaves = [self._chave_cache(id_produto) for id_produto in ids_produtos]
+        chaves += [self._chave_cache_negativo(id_produto) for id_produto in ids_produtos]
         try:
-            cached_product = await self.redis_client.get(cache_key)
-            if cached_product:
-                logger.info("Cache encontrado para produto", product_id=id_produto)
-                return json.loads(cached_product)
+            valores = await self.redis_client.mget(chaves)
         except Exception:
             logger.error("Erro ao acessar o cache Redis", exc_info=True)
+            return {}, []
+
+        total = len(ids_produtos)
+        agora = time.time()
+        produtos = {}
+        ids_desatualizados = []
+        for id_produto, valor, inexistente in zip(ids_produtos, valores[:total], valores[total:], strict=True):
+            entrada = self._decodificar(id_produto, valor) if valor else None
+            if entrada is not None:
+                if "produto" in entrada and "atualizado_em" in entrada:
+                    produtos[id_produto] = entrada["produto"]
+                    if agora - entrada["atualizado_em"] > settings.CACHE_TTL_SEGUNDOS:
+                        ids_desatualizados.append(id_produto)
+                else:
+                    # Entrada gravada antes da introdução do TTL flexível.
+                    produtos[id_produto] = entrada
+            elif inexistente:
+                produtos[id_produto] = None
+        return produtos, ids_desatualizados
+
+    @staticmethod
+    def _decodificar(id_produto: str, valor: bytes) -> dict[str, Any] | None:
+        """Decodifica uma entrada do cache; entradas ilegíveis são tratadas como ausentes."""
+        try:
+            return codec_cache_produtos.decodificar(valor)
+        except Exception:
+            logger.error("Erro ao decodificar produto do cache Redis", product_id=id_produto, exc_info=True)
+            return None
+
+    async def _salvar_no_cache(self, produtos: dict[str, dict[str, Any] | None]) -> None:
+        """
+        Grava os produtos no Redis em um único pipeline. Produtos inexistentes (None)
+        são gravados em chaves separadas, com o TTL do cache negativo.
+
+        Cada produto é gravado junto do instante da atualização e permanece no Redis
+        por `CACHE_TTL_SEGUNDOS + CACHE_STALE_SEGUNDOS`, permitindo servi-lo desatualizado.
+        """
+        if not produtos:
+            return
+        agora = time.time()
+        ttl_total = settings.CACHE_TTL_SEGUNDOS + settings.CACHE_STALE_SEGUNDOS
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for id_produto, dados_produto in produtos.items():
+                    if dados_produto is None:
+                        pipe.set(self._chave_cache_negativo(id_produto), 1, ex=settings.CACHE_NEGATIVO_TTL_SEGUNDOS)
+                        pipe.delete(self._chave_cache(id_produto))
+                    else:
+                        entrada = {"produto": dados_produto, "atualizado_em": agora}
+                        pipe.set(self._chave_cache(id_produto), codec_cache_produtos.codificar(entrada), ex=ttl_total)
+                await pipe.execute()
+        except Exception:
+            logger.error("Erro ao salvar dados no cache Redis", exc_info=True)
+
+    async def invalidar_produtos(self, ids_produtos: Sequence[str]) -> None:
+        """
+        Remove do cache (local e Redis) os produtos informados, tanto os dados
+        quanto o registro de inexistência, forçando uma nova consulta à API externa.
+        """
+        for id_produto in ids_produtos:
+            cache_local_produtos.remover(self._chave_cache(id_produto))
+        chaves = [self._chave_cache(id_produto) for id_produto in ids_produtos]
+        chaves += [self._chave_cache_negativo(id_produto) for id_produto in ids_produtos]
+        try:
+            await self.redis_client.delete(*chaves)
+        except Exception:
+            logger.error("Erro ao invalidar produtos no cache Redis", exc_info=True)
+
+    def _revalidar_em_segundo_plano(self, ids_produtos: list[str]) -> None:
+        """Agenda a atualização, em segundo plano, dos produtos servidos desatualizados."""
+        for id_produto in ids_produtos:
+            tarefa = asyncio.create_task(self._revalidar(id_produto))
+            _tarefas_revalidacao.add(tarefa)
+            tarefa.add_done_callback(_tarefas_revalidacao.discard)
+
+    async def _revalidar(self, id_produto: str) -> None:
+        """
+        Atualiza um produto desatualizado. Se a API externa falhar, o valor
+        desatualizado continua sendo servido até o fim da janela de tolerância.
+        """
+        try:
+            produto = await self._buscar_produto_ausente(id_produto)
+        except Exception:
+            logger.warn("Falha ao revalidar produto em segundo plano", product_id=id_produto, exc_info=True)
+            return
+        self._salvar_no_cache_local({id_produto: produto})
+        if not settings.CACHE_LOCK_DISTRIBUIDO:
+            await self._salvar_no_cache({id_produto: produto})
+
+    async def _buscar_produto_ausente(self, id_produto: str) -> dict[str, Any] | None:
+        """
+        Busca na API externa um produto ausente do cache, compartilhando uma única
+        chamada entre as requisições concorrentes do processo para o mesmo produto.
+        """
+        if settings.CACHE_LOCK_DISTRIBUIDO:
+            return await buscas_em_andamento.executar(id_produto, lambda: self._buscar_com_lock(id_produto))
+        return await buscas_em_andamento.executar(id_produto, lambda: self._buscar_na_api(id_produto))
+
+    async def _buscar_com_lock(self, id_produto: str) -> dict[str, Any] | None:
+        """
+        Garante, por meio de um lock no Redis, que apenas um worker busque o produto
+        na API externa; os demais aguardam o resultado ser gravado no cache.
+        """
+        chave_cache = self._chave_cache(id_produto)
+        async with lock_distribuido(self.redis_client, f"lock:{chave_cache}", settings.CACHE_LOCK_TTL_MS) as adquirido:
+            if adquirido:
+                produto = await self._buscar_na_api(id_produto)
+                await self._salvar_no_cache({id_produto: produto})
+                return produto
+
+        produto = await self._aguardar_cache(id_produto)
+        if produto is not AUSENTE:
+            return produto
 
-        logger.info("Cache não encontrado para produto", product_id=id_produto)
+        logger.warn("Tempo de espera pelo lock do produto esgotado", product_id=id_produto)
+        produto = await self._buscar_na_api(id_produto)
+        await self._salvar_no_cache({id_produto: produto})
+        return produto
 
+    async def _aguardar_cache(self, id_produto: str) -> Any:
+        """Aguarda o produto ser gravado no cache por outro worker, até o tempo limite configurado."""
+        intervalo = settings.CACHE_LOCK_INTERVALO_MS / 1000
+        tentativas = max(1, settings.CACHE_LOCK_ESPERA_MS // settings.CACHE_LOCK_INTERVALO_MS)
+        for _ in range(tentativas):
+            await asyncio.sleep(intervalo)
+            produtos, _ = await self._buscar_no_cache([id_produto])
+            if id_produto in produtos:
+                return produtos[id_produto]
+        return AUSENTE
+
+    async def _buscar_na_api(self, id_produto: str) -> dict[str, Any] | None:
+        """
+        Busca os detalhes de um produto diretamente na API externa.
+        Retorna None quando o produto não existe.
+
+        As chamadas são limitadas por processo a `API_PRODUTO_MAX_CONCORRENCIA` e protegidas
+        por um disjuntor: com a API instável, falham imediatamente com 503 em vez de aguardar.
+        Respostas 5xx e 429 contam como falhas para o disjuntor; os demais erros 4xx, exceto
+        404, não indicam instabilidade da API, mas também resultam em 503.
+        """
         url = f"{self.url_base}/{id_produto}/"
-        async with httpx.AsyncClient() as client:
-            try:
-                start_time = time.monotonic()
-                logger.debug("Chamando API externa de produtos", url=url)
-
-                resposta = await client.get(url, timeout=10.0)
-                duracao = (time.monotonic() - start_time) * 1000
-                logger.info(
-                    "Resposta recebida da API externa de produtos",
-                    url=url,
-                    status_code=resposta.status_code,
-                    duration_ms=round(duracao, 2)
-                )
-                if resposta.status_code == 200:
-                    dados_produto = resposta.json()
-                    try:
-                        await self.redis_client.set(
-                            cache_key,
-                            json.dumps(dados_produto),
-                            ex=settings.CACHE_TTL_SEGUNDOS
-                        )
-                    except Exception:
-                        logger.error("Erro ao salvar dados no cache Redis", exc_info=True)
-                    return dados_produto
-                elif resposta.status_code == 404:
-                    return None
-                else:
-                    resposta.raise_for_status()
-
-            except httpx.RequestError as exc:
-                logger.error("Erro de comunicação com a API de produtos", exc_info=True)
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="O serviço externo de produtos está indisponível."
-                ) from exc
+        try:
+            async with asyncio.timeout(settings.API_PRODUTO_ESPERA_CONCORRENCIA_SEGUNDOS):
+                await limite_chamadas_api.acquire()
+        except TimeoutError as exc:
+            logger.warn("Limite de chamadas concorrentes à API de produtos atingido", url=url)
+            raise self._servico_indisponivel() from exc
+
+        try:
+            async with circuito_api_produtos.proteger():
+                resposta = await self._requisitar(url)
+            if resposta.status_code != 404:
+                resposta.raise_for_status()
+        except CircuitoAbertoError as exc:
+            logger.warn("Chamada à API de produtos rejeitada pelo circuito aberto", url=url)
+            raise self._servico_indisponivel() from exc
+        except (httpx.RequestError, httpx.HTTPStatusError) as exc:
+            logger.error("Erro de comunicação com a API de produtos", exc_info=True)
+            raise self._servico_indisponivel() from exc
+        finally:
+            limite_chamadas_api.release()
+
+        if resposta.status_code == 200:
+            return resposta.json()
         return None
 
+    async def _requisitar(self, url: str) -> httpx.Response:
+        """
+        Executa a chamada HTTP, tratando respostas 5xx e 429 (limite de requisições da API)
+        como falha da API externa.
+        """
+        start_time = time.monotonic()
+        logger.debug("Chamando API externa de produtos", url=url)
+
+        resposta = await self.http_client.get(url)
+        duracao = (time.monotonic() - start_time) * 1000
+        logger.info(
+            "Resposta recebida da API externa de produtos",
+            url=url,
+            status_code=resposta.status_code,
+            duration_ms=round(duracao, 2)
+        )
+        if resposta.is_server_error or resposta.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            resposta.raise_for_status()
+        return resposta
+
+    @staticmethod
+    def _servico_indisponivel() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="O serviço externo de produtos está indisponível."
+        )
+
     async def verificar_existencia_produto(self, id_produto: str) -> bool:
         """
         Verifica de forma rápida se um produto existe na API externa.
@@ -80,8 +344,14 @@ class ClienteApiProdutos:
         detalhes = await self.obter_detalhes_produto(id_produto)
         return detalhes is not None
 
+_cliente_api_produtos: ClienteApiProdutos | None = None
+
 def obter_cliente_api_produtos() -> ClienteApiProdutos:
     """
-    Dependência do FastAPI que cria e retorna uma instância do cliente da API de produtos.
+    Dependência do FastAPI que retorna a instância do cliente da API de produtos,
+    compartilhada por todas as requisições do processo.
     """
-    return ClienteApiProdutos()
+    global _cliente_api_produtos
+    if _cliente_api_produtos is None:
+        _cliente_api_produtos = ClienteApiProdutos()
+    return _cliente_api_produtos
@@ -0,0 +1,94 @@
+import time
+
+import structlog
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.core.single_flight import lock_distribuido
+from app.db.models import ProdutoFavorito
+from app.db.session import AsyncSessionLocal
+from app.services.api_produtos_servico import ClienteApiProdutos, obter_cliente_api_produtos
+
+logger = structlog.get_logger(__name__)
+
+CHAVE_LOCK_AQUECIMENTO = "lock:aquecimento_cache_produtos"
+
+
+async def listar_produtos_mais_favoritados(db: AsyncSession, limite: int) -> list[str]:
+    """Retorna os IDs dos produtos mais favoritados, do mais para o menos popular."""
+    consulta = (
+        select(ProdutoFavorito.produto_id)
+        .group_by(ProdutoFavorito.produto_id)
+        .order_by(func.count(ProdutoFavorito.id).desc())
+        .limit(limite)
+    )
+    resultado = await db.execute(consulta)
+    return list(resultado.scalars().all())
+
+async def aquecer_cache_produtos(
+    db: AsyncSession,
+    cliente_api_produtos: ClienteApiProdutos,
+    limite: int,
+    tamanho_lote: int,
+) -> int:
+    """
+    Pré-carrega no cache os detalhes dos produtos mais favoritados, em lotes,
+    para que a primeira leva de listagens não precise consultar a API externa.
+    Retorna a quantidade de produtos encontrados na API externa.
+    """
+    inicio = time.monotonic()
+    ids_produtos = await listar_produtos_mais_favoritados(db, limite)
+    logger.info("Iniciando aquecimento do cache de produtos", total=len(ids_produtos))
+
+    total_aquecidos = 0
+    for posicao in range(0, len(ids_produtos), tamanho_lote):
+        lote = ids_produtos[posicao:posicao + tamanho_lote]
+        try:
+            produtos = await cliente_api_produtos.obter_detalhes_produtos(lote)
+        except HTTPException:
+            logger.warn("Aquecimento do cache interrompido: API de produtos indisponível", processados=posicao)
+            break
+        total_aquecidos += sum(1 for produto in produtos if produto is not None)
+        logger.info(
+            "Lote do aquecimento do cache processado",
+            processados=posicao + len(lote),
+            total=len(ids_produtos),
+        )
+
+    logger.info(
+        "Aquecimento do cache de produtos concluído",
+        total_aquecidos=total_aquecidos,
+        duration_ms=round((time.monotonic() - inicio) * 1000, 2),
+    )
+    return total_aquecidos
+
+async def executar_aquecimento_cache(limite: int | None = None) -> int:
+    """Executa o aquecimento do cache com uma sessão própria, fora do ciclo de uma requisição."""
+    async with AsyncSessionLocal() as db:
+        return await aquecer_cache_produtos(
+            db=db,
+            cliente_api_produtos=obter_cliente_api_produtos(),
+            limite=limite or settings.CACHE_AQUECIMENTO_LIMITE,
+            tamanho_lote=settings.CACHE_AQUECIMENTO_TAMANHO_LOTE,
+        )
+
+async def executar_aquecimento_cache_na_inicializacao() -> None:
+    """
+    Aquecimento disparado na inicialização de cada worker. Um lock no Redis garante que apenas
+    um worker aqueça o cache compartilhado; os que iniciarem enquanto ele estiver em andamento
+    (até `CACHE_AQUECIMENTO_LOCK_TTL_SEGUNDOS`) não repetem o aquecimento.
+    """
+    try:
+        async with lock_distribuido(
+            get_redis_client(), CHAVE_LOCK_AQUECIMENTO, ttl_ms=settings.CACHE_AQUECIMENTO_LOCK_TTL_SEGUNDOS * 1000
+        ) as adquirido:
+            if not adquirido:
+                logger.info("Aquecimento do cache em andamento em outro worker")
+                return
+            await executar_aquecimento_cache()
+    except Exception:
+        logger.error("Erro no aquecimento do cache de produtos na inicialização", exc_info=True)
@@ -1,18 +1,104 @@
+import uuid
+
+import structlog
+from fastapi import HTTPException, status
+from jose import JWTError
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import gerar_token, verificar_senha
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.core.limitador_taxa import LimitadorTaxa
+from app.core.security import (
+    TIPO_TOKEN_ATUALIZACAO,
+    gerar_token,
+    gerar_token_atualizacao,
+    verificar_e_atualizar_senha_async,
+    verificar_token,
+)
 from app.db.models import Cliente
 from app.services import cliente_servico
 
+logger = structlog.get_logger(__name__)
+
+limitador_login = LimitadorTaxa("login", janela_segundos=settings.LOGIN_JANELA_SEGUNDOS)
+
 
-async def autenticar_cliente(db: AsyncSession, email: str, password: str) -> Cliente | None:
+def _identificador_usuario(email: str) -> str:
+    return f"usuario:{email.strip().lower()}"
+
+async def verificar_limite_login(email: str, ip: str | None) -> None:
+    """
+    Registra uma tentativa de login e lança 429 se o usuário ou o IP excederam o limite
+    de tentativas na janela, antes de qualquer consulta ao banco ou verificação de senha.
+    """
+    if not settings.LOGIN_LIMITE_HABILITADO:
+        return
+    limites = {_identificador_usuario(email): settings.LOGIN_LIMITE_POR_USUARIO}
+    if ip:
+        limites[f"ip:{ip}"] = settings.LOGIN_LIMITE_POR_IP
+    espera_segundos = await limitador_login.consumir(get_redis_client(), limites)
+    if espera_segundos:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Muitas tentativas de login. Tente novamente mais tarde.",
+            headers={"Retry-After": str(espera_segundos)},
+        )
+
+def gerar_tokens(cliente: Cliente) -> dict[str, str]:
+    """Emite um par de tokens de acesso e de atualização para o cliente, na sua versão de token atual."""
+    return {
+        "access_token": gerar_token(subject=str(cliente.id), versao=cliente.versao_token),
+        "refresh_token": gerar_token_atualizacao(subject=str(cliente.id), versao=cliente.versao_token),
+        "token_type": "bearer",
+    }
+
+async def autenticar_cliente(db: AsyncSession, email: str, password: str) -> dict[str, str] | None:
     """
     Autentica um usuário (neste caso, um cliente).
-    Retorna o objeto do cliente se as credenciais forem válidas, senão None.
+    Retorna os tokens de acesso e de atualização se as credenciais forem válidas, senão None.
+    Se o hash da senha usar um esquema ou custo diferentes dos configurados, ele é regravado.
     """
     cliente = await cliente_servico.recuperar_cliente_por_email(db, email=email)
 
-    if not cliente or not verificar_senha(password, cliente.hash_senha):
+    if not cliente:
+        return None
+    senha_valida, novo_hash_senha = await verificar_e_atualizar_senha_async(password, cliente.hash_senha)
+    if not senha_valida:
         return None
+    if novo_hash_senha is not None:
+        await _atualizar_hash_senha(db, cliente, novo_hash_senha)
 
-    return gerar_token(subject=str(cliente.id))
+    if settings.LOGIN_LIMITE_HABILITADO:
+        await limitador_login.liberar(get_redis_client(), _identificador_usuario(email))
+    return gerar_tokens(cliente)
+
+async def _atualizar_hash_senha(db: AsyncSession, cliente: Cliente, novo_hash_senha: str) -> None:
+    """Substitui um hash de senha gerado com esquema ou custo desatualizados."""
+    await db.execute(
+        update(Cliente)
+        .where(Cliente.id == cliente.id, Cliente.hash_senha == cliente.hash_senha)
+        .values(hash_senha=novo_hash_senha)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    logger.info("Hash de senha atualizado para o esquema e custo configurados", cliente_id=str(cliente.id))
+
+async def renovar_tokens(db: AsyncSession, token_atualizacao: str) -> dict[str, str] | None:
+    """
+    Emite um novo par de tokens a partir de um token de atualização válido, conferindo no banco
+    que o cliente continua ativo e que o token não foi revogado. Retorna None caso contrário.
+    """
+    try:
+        payload = verificar_token(token_atualizacao)
+        id_cliente = uuid.UUID(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+    if payload.get("typ") != TIPO_TOKEN_ATUALIZACAO:
+        return None
+
+    cliente = await cliente_servico.recuperar_cliente(db, id=id_cliente)
+    if cliente is None or cliente.versao_token != payload.get("ver"):
+        logger.warn("Token de atualização revogado ou de cliente inexistente", cliente_id=str(id_cliente))
+        return None
+    return gerar_tokens(cliente)
@@ -0,0 +1,143 @@
+import json
+import uuid
+from datetime import datetime
+
+import structlog
+
+from app.core.cache import AUSENTE, CacheLocal, get_redis_client
+from app.core.config import settings
+from app.db.models import Cliente
+
+logger = structlog.get_logger(__name__)
+
+# O hash da senha e os contadores não são guardados: o cliente em cache
+# serve apenas para identificar e autorizar quem fez a requisição.
+_CAMPOS_DATA = ("created_at", "updated_at")
+
+cache_local_clientes = CacheLocal(
+    tamanho_maximo=settings.CLIENTE_CACHE_LOCAL_TAMANHO_MAXIMO,
+    ttl_segundos=settings.CLIENTE_CACHE_LOCAL_TTL_SEGUNDOS,
+)
+
+
+def habilitado() -> bool:
+    return settings.CLIENTE_CACHE_TTL_SEGUNDOS > 0
+
+def _chave(cliente_id: uuid.UUID) -> str:
+    return f"cliente:{cliente_id}"
+
+def _serializar(cliente: Cliente) -> str:
+    return json.dumps({
+        "id": str(cliente.id),
+        "nome": cliente.nome,
+        "email": cliente.email,
+        "created_at": cliente.created_at.isoformat(),
+        "updated_at": cliente.updated_at.isoformat(),
+        "versao_token": cliente.versao_token,
+    })
+
+def _desserializar(valor: str) -> Cliente:
+    """Reconstrói o cliente como um objeto transiente, não associado a nenhuma sessão."""
+    dados = json.loads(valor)
+    dados["id"] = uuid.UUID(dados["id"])
+    for campo in _CAMPOS_DATA:
+        dados[campo] = datetime.fromisoformat(dados[campo])
+    return Cliente(**dados)
+
+
+async def obter(cliente_id: uuid.UUID) -> Cliente | None:
+    """
+    Retorna o cliente ativo em cache (memória local e, em seguida, Redis),
+    ou None se ele não estiver em cache ou o Redis estiver indisponível.
+    """
+    chave = _chave(cliente_id)
+    valor = cache_local_clientes.obter(chave)
+    if valor is AUSENTE:
+        try:
+            valor = await get_redis_client().get(chave)
+        except Exception:
+            logger.error("Erro ao consultar cliente no cache", cliente_id=str(cliente_id), exc_info=True)
+            return None
+        if valor is None:
+            return None
+        cache_local_clientes.definir(chave, valor)
+    return _desserializar(valor)
+
+async def armazenar(cliente: Cliente) -> None:
+    """Guarda o cliente ativo no cache local e no Redis."""
+    chave = _chave(cliente.id)
+    valor = _serializar(cliente)
+    cache_local_clientes.definir(chave, valor)
+    try:
+        await get_redis_client().set(chave, valor, ex=settings.CLIENTE_CACHE_TTL_SEGUNDOS)
+    except Exception:
+        logger.error("Erro ao gravar cliente no cache", cliente_id=str(cliente.id), exc_info=True)
+
+async def invalidar(cliente_id: uuid.UUID) -> None:
+    """
+    Remove o cliente do cache após uma alteração. Os caches locais dos demais
+    workers expiram em até `CLIENTE_CACHE_LOCAL_TTL_SEGUNDOS`.
+    """
+    chave = _chave(cliente_id)
+    cache_local_clientes.remover(chave)
+    try:
+        await get_redis_client().delete(chave)
+    except Exception:
+        logger.error("Erro ao invalidar cliente no cache", cliente_id=str(cliente_id), exc_info=True)
+
+# Só grava a versão se ela for maior que a publicada, para que a republicação feita após uma
+# consulta ao banco (possivelmente atrasada) nunca desfaça uma revogação mais recente.
+_SCRIPT_PUBLICAR_VERSAO_TOKEN = """
+local atual = tonumber(redis.call('GET', KEYS[1]))
+if atual == nil or atual < tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+def _chave_versao_token(cliente_id: uuid.UUID) -> str:
+    return f"versao_token:{cliente_id}"
+
+async def registrar_versao_token(cliente_id: uuid.UUID, versao: int) -> None:
+    """
+    Publica no Redis a versão de token do cliente, revogando os tokens de acesso de versões
+    anteriores. O registro só precisa durar enquanto esses tokens ainda forem válidos.
+    Lança a exceção do Redis se não for possível publicá-la.
+    """
+    await get_redis_client().eval(
+        _SCRIPT_PUBLICAR_VERSAO_TOKEN,
+        1,
+        _chave_versao_token(cliente_id),
+        versao,
+        settings.TEMPO_EXPIRACAO_TOKEN_MINUTOS * 60,
+    )
+
+async def republicar_versao_token(cliente_id: uuid.UUID, versao: int) -> None:
+    """
+    Como `registrar_versao_token`, para a versão lida do banco quando a publicada era desconhecida.
+    Falhas são apenas registradas: sem a versão no Redis, a próxima requisição consulta o banco de novo.
+    """
+    try:
+        await registrar_versao_token(cliente_id, versao)
+    except Exception:
+        logger.error("Erro ao republicar versão de token no Redis", cliente_id=str(cliente_id), exc_info=True)
+
+async def descartar_versao_token(cliente_id: uuid.UUID) -> None:
+    """Remove a versão publicada, fazendo a autorização do cliente voltar a consultar o banco."""
+    try:
+        await get_redis_client().delete(_chave_versao_token(cliente_id))
+    except Exception:
+        logger.error("Erro ao descartar versão de token no Redis", cliente_id=str(cliente_id), exc_info=True)
+
+async def obter_versao_token(cliente_id: uuid.UUID) -> int | None:
+    """
+    Retorna a versão de token publicada para o cliente, ou None se ela for desconhecida
+    (chave ausente, expirada ou Redis indisponível), caso em que é preciso consultar o banco.
+    """
+    try:
+        valor = await get_redis_client().get(_chave_versao_token(cliente_id))
+    except Exception:
+        logger.error("Erro ao consultar versão de token no Redis", cliente_id=str(cliente_id), exc_info=True)
+        return None
+    return int(valor) if valor is not None else None
@@ -0,0 +1,189 @@
+import uuid
+from datetime import datetime, timedelta
+
+import structlog
+from redis.exceptions import WatchError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.db.models import ProdutoFavorito
+
+logger = structlog.get_logger(__name__)
+
+# Membro com pontuação -inf que indica que o conjunto foi carregado do banco,
+# distinguindo um cliente sem favoritos de um conjunto ausente do Redis.
+_MARCADOR_CARREGADO = ""
+_EPOCH = datetime(1970, 1, 1)
+
+# As escritas incrementam a versão do conjunto (KEYS[2]), o que aborta uma carga
+# concorrente que tenha lido o banco antes delas (ver `carregar`).
+_SCRIPT_ADICIONAR = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    for i = 2, #ARGV, 2 do
+        redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    return 1
+end
+return 0
+"""
+
+_SCRIPT_REMOVER = """
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('ZREM', KEYS[1], unpack(ARGV, 2))
+end
+return 0
+"""
+
+
+def _chave(cliente_id: uuid.UUID) -> str:
+    return f"favoritos:{cliente_id}"
+
+def _chave_versao(cliente_id: uuid.UUID) -> str:
+    return f"favoritos_versao:{cliente_id}"
+
+def _pontuacao(created_at: datetime) -> int:
+    """
+    Converte a data de inclusão em microssegundos desde a época. O valor inteiro é representado
+    sem perda pelo Redis, de modo que a ordem (pontuação, membro) do conjunto é a mesma
+    ordem (created_at, produto_id) usada na paginação pelo banco.
+    """
+    return (created_at.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1)
+
+def _created_at(pontuacao: float) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(pontuacao))
+
+
+async def carregar(db: AsyncSession, cliente_id: uuid.UUID) -> bool:
+    """
+    Reconstrói o conjunto de favoritos do cliente no Redis a partir do banco de dados.
+    `db` deve ser uma sessão do primário, para que o conjunto não reflita o atraso da réplica.
+
+    A versão do conjunto é observada (WATCH) antes da leitura do banco: se um favorito for
+    incluído ou removido durante a carga, a gravação é abortada e o conjunto permanece ausente,
+    em vez de ser gravado sem essa alteração. Retorna se o conjunto foi gravado.
+    """
+    chave = _chave(cliente_id)
+    async with get_redis_client().pipeline(transaction=True) as pipe:
+        await pipe.watch(_chave_versao(cliente_id))
+        resultado = await db.execute(
+            select(ProdutoFavorito.produto_id, ProdutoFavorito.created_at)
+            .where(ProdutoFavorito.cliente_id == cliente_id)
+        )
+        membros = {produto_id: _pontuacao(created_at) for produto_id, created_at in resultado.all()}
+        membros[_MARCADOR_CARREGADO] = float("-inf")
+
+        pipe.multi()
+        pipe.delete(chave)
+        pipe.zadd(chave, membros)
+        pipe.expire(chave, settings.FAVORITOS_CACHE_TTL_SEGUNDOS)
+        try:
+            await pipe.execute()
+        except WatchError:
+            logger.info("Favoritos alterados durante a carga; conjunto não gravado no Redis", client_id=cliente_id)
+            return False
+    logger.info("Conjunto de favoritos carregado no Redis", client_id=cliente_id, total=len(membros) - 1)
+    return True
+
+async def obter_pagina(
+    db: AsyncSession,
+    cliente_id: uuid.UUID,
+    deslocamento: int,
+    limite: int,
+    apos: tuple[datetime, str] | None = None,
+) -> tuple[list[tuple[str, datetime]], int] | None:
+    """
+    Retorna até `limite` favoritos do cliente, como pares (produto_id, created_at), e o total.
+    Com `apos`, retorna os favoritos seguintes a essa chave de ordenação; senão, a partir
+    de `deslocamento`. Carrega o conjunto do banco (`db`, do primário) se ele não estiver
+    no Redis e retorna None se não for possível carregá-lo ou o Redis estiver indisponível.
+    """
+    try:
+        resultado = await _consultar_pagina(cliente_id, deslocamento, limite, apos)
+        if resultado is None and await carregar(db, cliente_id):
+            resultado = await _consultar_pagina(cliente_id, deslocamento, limite, apos)
+        return resultado
+    except Exception:
+        logger.error("Erro ao consultar favoritos no Redis", client_id=cliente_id, exc_info=True)
+        return None
+
+async def _consultar_pagina(
+    cliente_id: uuid.UUID,
+    deslocamento: int,
+    limite: int,
+    apos: tuple[datetime, str] | None,
+) -> tuple[list[tuple[str, datetime]], int] | None:
+    chave = _chave(cliente_id)
+    async with get_redis_client().pipeline(transaction=False) as pipe:
+        pipe.zcard(chave)
+        if apos is None:
+            inicio = 1 + deslocamento
+            pipe.zrange(chave, inicio, inicio + limite - 1, withscores=True)
+        else:
+            created_at, produto_id = apos
+            pontuacao = _pontuacao(created_at)
+            pipe.zrange(chave, pontuacao, pontuacao, byscore=True, withscores=True)
+            pipe.zrange(chave, f"({pontuacao}", "+inf", byscore=True, offset=0, num=limite, withscores=True)
+        respostas = await pipe.execute()
+
+    total = respostas[0]
+    if total == 0:
+        return None
+
+    if apos is None:
+        itens = respostas[1]
+    else:
+        # Favoritos com a mesma data de inclusão do cursor são desempatados pelo produto_id.
+        itens = [item for item in respostas[1] if item[0] > apos[1]] + respostas[2]
+    favoritos = [(produto_id, _created_at(pontuacao)) for produto_id, pontuacao in itens[:limite]]
+    return favoritos, total - 1
+
+async def adicionar(cliente_id: uuid.UUID, favoritos: list[tuple[str, datetime]]) -> None:
+    """Inclui favoritos no conjunto do cliente, caso ele esteja carregado no Redis."""
+    if not favoritos:
+        return
+    argumentos = [settings.FAVORITOS_CACHE_TTL_SEGUNDOS]
+    for produto_id, created_at in favoritos:
+        argumentos += [_pontuacao(created_at), produto_id]
+    try:
+        await get_redis_client().eval(
+            _SCRIPT_ADICIONAR, 2, _chave(cliente_id), _chave_versao(cliente_id), *argumentos
+        )
+    except Exception:
+        await _descartar_apos_falha(cliente_id)
+
+async def remover(cliente_id: uuid.UUID, produtos_ids: list[str]) -> None:
+    """Remove favoritos do conjunto do cliente, caso ele esteja carregado no Redis."""
+    if not produtos_ids:
+        return
+    try:
+        await get_redis_client().eval(
+            _SCRIPT_REMOVER,
+            2,
+            _chave(cliente_id),
+            _chave_versao(cliente_id),
+            settings.FAVORITOS_CACHE_TTL_SEGUNDOS,
+            *produtos_ids,
+        )
+    except Exception:
+        await _descartar_apos_falha(cliente_id)
+
+async def descartar(cliente_id: uuid.UUID) -> None:
+    """Remove o conjunto do cliente do Redis; ele será recarregado do banco na próxima leitura."""
+    async with get_redis_client().pipeline(transaction=True) as pipe:
+        pipe.delete(_chave(cliente_id))
+        pipe.incr(_chave_versao(cliente_id))
+        pipe.expire(_chave_versao(cliente_id), settings.FAVORITOS_CACHE_TTL_SEGUNDOS)
+        await pipe.execute()
+
+async def _descartar_apos_falha(cliente_id: uuid.UUID) -> None:
+    logger.error("Erro ao atualizar favoritos no Redis", client_id=cliente_id, exc_info=True)
+    try:
+        await descartar(cliente_id)
+    except Exception:
+        logger.error("Erro ao descartar favoritos do Redis", client_id=cliente_id, exc_info=True)
@@ -2,43 +2,53 @@ import uuid
 
 import structlog
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import func, update
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.core.security import gerar_hash_senha
+from app.core.config import settings
+from app.core.security import gerar_hash_senha_async
+from app.db.dialeto import insert_do_dialeto
 from app.db.models import Cliente
+from app.db.session import marcar_escrita_recente
 from app.schemas.cliente_schema import ClienteAtualizar, ClienteCadastrar
+from app.services import cache_cliente_servico
 
 logger = structlog.get_logger(__name__)
 
 
 async def criar_cliente(db: AsyncSession, cliente_cadastrar: ClienteCadastrar) -> Cliente:
-    """Cria um novo cliente no banco de dados."""
+    """
+    Cria um novo cliente no banco de dados com um único INSERT ... ON CONFLICT DO NOTHING RETURNING,
+    retornando 409 quando já existe um cliente ativo com o mesmo e-mail.
+    """
     logger.info("Iniciando o cadastro de cliente")
-    hash_senha = gerar_hash_senha(cliente_cadastrar.senha)
-    cliente = Cliente(
-        nome=cliente_cadastrar.nome,
-        email=cliente_cadastrar.email,
-        hash_senha=hash_senha
-    )
-    db.add(cliente)
-    try:
-        await db.commit()
-        await db.refresh(cliente)
-        logger.info(
-            "Cliente cadastrado com sucesso",
-            cliente_id=str(cliente.id),
+    hash_senha = await gerar_hash_senha_async(cliente_cadastrar.senha)
+    insercao = (
+        insert_do_dialeto(db, Cliente)
+        .values(
+            nome=cliente_cadastrar.nome,
+            email=cliente_cadastrar.email,
+            hash_senha=hash_senha
         )
-        return cliente
-    except IntegrityError as err:
-        await db.rollback()
+        .on_conflict_do_nothing(index_elements=["email"], index_where=Cliente.deleted_at.is_(None))
+        .returning(Cliente)
+    )
+    cliente = await db.scalar(insercao)
+    await db.commit()
+    if cliente is None:
         logger.warn("Tentativa de cadastrar cliente com e-mail já registrado previamente")
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Já existe um cliente registrado com o e-mail fornecido.",
-        ) from err
+        )
+    await marcar_escrita_recente(cliente.id)
+    logger.info(
+        "Cliente cadastrado com sucesso",
+        cliente_id=str(cliente.id),
+    )
+    return cliente
 
 async def recuperar_cliente(db: AsyncSession, id: uuid.UUID) -> Cliente | None:
     """Busca um cliente pelo seu ID."""
@@ -53,6 +63,23 @@ async def recuperar_cliente(db: AsyncSession, id: uuid.UUID) -> Cliente | None:
         logger.debug("Cliente não encontrado por ID", cliente_id=id)
     return cliente
 
+async def recuperar_cliente_em_cache(db: AsyncSession, id: uuid.UUID) -> Cliente | None:
+    """
+    Busca um cliente ativo pelo seu ID consultando antes o cache de clientes, quando habilitado.
+    O cliente vindo do cache é um objeto transiente, sem o hash da senha.
+    """
+    if not cache_cliente_servico.habilitado():
+        return await recuperar_cliente(db, id)
+
+    cliente = await cache_cliente_servico.obter(id)
+    if cliente is not None:
+        return cliente
+
+    cliente = await recuperar_cliente(db, id)
+    if cliente is not None:
+        await cache_cliente_servico.armazenar(cliente)
+    return cliente
+
 async def recuperar_cliente_por_email(db: AsyncSession, email: str) -> Cliente | None:
     """Busca um cliente pelo seu email."""
     logger.debug("Buscando cliente por e-mail")
@@ -71,20 +98,37 @@ async def recuperar_cliente_por_email(db: AsyncSession, email: str) -> Cliente |
 async def atualizar_cliente(
     db: AsyncSession, cliente: Cliente, cliente_atualizar: ClienteAtualizar
 ) -> Cliente:
-    """Atualiza os dados de um cliente."""
+    """
+    Atualiza os dados de um cliente ativo com um UPDATE ... RETURNING pelo ID, sem depender
+    da sessão em que `cliente` foi carregado (que pode ser a da réplica de leitura, ou nenhuma,
+    na autorização sem consulta ao banco). Lança 404 se o cliente não existir ou estiver excluído.
+    """
     cliente_id = str(cliente.id)
     logger.info(
         "Iniciando atualização de cliente",
         cliente_id=cliente_id,
         novos_dados={"nome": cliente_atualizar.nome, "email": cliente_atualizar.email}
     )
-    cliente.nome = cliente_atualizar.nome
-    cliente.email = cliente_atualizar.email
     try:
+        cliente_atualizado = await db.scalar(
+            update(Cliente)
+            .where(Cliente.id == cliente.id, Cliente.deleted_at.is_(None))
+            .values(nome=cliente_atualizar.nome, email=cliente_atualizar.email)
+            .returning(Cliente)
+            .execution_options(populate_existing=True)
+        )
         await db.commit()
-        await db.refresh(cliente)
+        if cliente_atualizado is None:
+            logger.warn("Tentativa de atualizar cliente inexistente ou excluído", cliente_id=cliente_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Cliente não encontrado.",
+            )
+        await marcar_escrita_recente(cliente.id)
+        if cache_cliente_servico.habilitado():
+            await cache_cliente_servico.invalidar(cliente.id)
         logger.info("Cliente atualizado com sucesso", cliente_id=cliente_id)
-        return cliente
+        return cliente_atualizado
     except IntegrityError as err:
         await db.rollback()
         logger.warn(
@@ -110,17 +154,36 @@ async def atualizar_cliente(
 
 
 async def excluir_cliente(db: AsyncSession, cliente: Cliente):
-    """Exclui logicamente um cliente."""
+    """
+    Exclui logicamente um cliente, marcando `deleted_at` com um UPDATE direto pelo ID.
+    A versão de token do cliente é incrementada, revogando os tokens já emitidos.
+
+    Com `AUTORIZACAO_SEM_CONSULTA_BD`, a nova versão é publicada no Redis antes do commit:
+    se não for possível publicá-la, a exclusão é desfeita e retorna 503, pois os tokens
+    de acesso do cliente continuariam aceitos sem consulta ao banco.
+    """
     cliente_id = str(cliente.id)
     logger.info(
         "Iniciando exclusão de cliente",
         cliente_id=cliente_id
     )
 
+    versao_publicada = False
     try:
-        cliente.deleted_at = func.now()
-        db.add(cliente)
+        nova_versao_token = await db.scalar(
+            update(Cliente)
+            .where(Cliente.id == cliente.id, Cliente.deleted_at.is_(None))
+            .values(deleted_at=func.now(), versao_token=Cliente.versao_token + 1)
+            .returning(Cliente.versao_token)
+            .execution_options(synchronize_session=False)
+        )
+        if nova_versao_token is not None and settings.AUTORIZACAO_SEM_CONSULTA_BD:
+            await _publicar_revogacao(db, cliente.id, nova_versao_token)
+            versao_publicada = True
         await db.commit()
+        await marcar_escrita_recente(cliente.id)
+        if cache_cliente_servico.habilitado():
+            await cache_cliente_servico.invalidar(cliente.id)
 
         logger.info(
             "Cliente excluído com sucesso",
@@ -128,6 +191,8 @@ async def excluir_cliente(db: AsyncSession, cliente: Cliente):
         )
     except SQLAlchemyError as err:
         await db.rollback()
+        if versao_publicada:
+            await cache_cliente_servico.descartar_versao_token(cliente.id)
         logger.error(
             "Erro de banco de dados ao excluir cliente",
             cliente_id=cliente_id,
@@ -137,3 +202,19 @@ async def excluir_cliente(db: AsyncSession, cliente: Cliente):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ocorreu um erro ao excluir o cliente.",
         ) from err
+
+async def _publicar_revogacao(db: AsyncSession, cliente_id: uuid.UUID, versao_token: int) -> None:
+    """Publica a nova versão de token do cliente, desfazendo a exclusão e lançando 503 se falhar."""
+    try:
+        await cache_cliente_servico.registrar_versao_token(cliente_id, versao_token)
+    except Exception as err:
+        await db.rollback()
+        logger.error(
+            "Não foi possível publicar a revogação dos tokens; exclusão do cliente desfeita",
+            cliente_id=str(cliente_id),
+            exc_info=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Não foi possível excluir o cliente no momento. Tente novamente.",
+        ) from err
@@ -1,67 +1,179 @@
-import asyncio
+import base64
+import json
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
 
 import structlog
 from fastapi import HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.future import select
 
+from app.core.config import settings
+from app.db.dialeto import insert_do_dialeto
 from app.db.models import Cliente, ProdutoFavorito
+from app.db.session import marcar_escrita_recente
+from app.schemas.produto_favorito_schema import ResultadoItemLote, SituacaoItemLote
 from app.schemas.produto_schema import ProdutoSchema
+from app.services import cache_favoritos_servico
 from app.services.api_produtos_servico import ClienteApiProdutos
 
 logger = structlog.get_logger(__name__)
 
 
+def codificar_cursor(created_at: datetime, produto_id: str) -> str:
+    """Gera um cursor opaco a partir da chave de ordenação do último favorito retornado."""
+    conteudo = json.dumps([created_at.isoformat(), produto_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(conteudo).decode("ascii")
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Extrai a chave de ordenação de um cursor, lançando 400 se ele for inválido. Os instantes
+    dos favoritos são gravados sem fuso horário, então um cursor com fuso também é inválido.
+    """
+    try:
+        created_at, produto_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is not None:
+            raise ValueError("O instante do cursor não deve ter fuso horário.")
+        return created_at, str(produto_id)
+    except (ValueError, TypeError) as err:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O cursor de paginação informado é inválido.",
+        ) from err
+
+def _atualizar_contador(cliente_id: uuid.UUID, variacao: int):
+    """Instrução que ajusta o total de favoritos mantido no cliente, na mesma transação da alteração."""
+    return (
+        update(Cliente)
+        .where(Cliente.id == cliente_id)
+        .values(total_favoritos=Cliente.total_favoritos + variacao)
+        .execution_options(synchronize_session=False)
+    )
+
 async def listar_favoritos(
     db: AsyncSession,
     cliente: Cliente,
     cliente_api_produtos: ClienteApiProdutos,
     pagina: int,
-    tamanho: int
-) -> tuple[list[ProdutoSchema], int]:
+    tamanho: int,
+    cursor: str | None = None,
+    db_primario: AsyncSession | None = None,
+) -> tuple[list[ProdutoSchema], int, str | None]:
     """
-    Busca os favoritos do cliente de forma paginada.
+    Busca os favoritos do cliente de forma paginada, em ordem de inclusão.
+    O total vem do contador mantido no próprio cliente, sem contar os favoritos a cada página.
+    Com um `cursor`, retorna os itens seguintes ao cursor (paginação por chave),
+    ignorando `pagina`. Retorna também o cursor da próxima página, se houver.
+
+    Com `FAVORITOS_CACHE_REDIS` habilitado, a página e o total são lidos do conjunto
+    de favoritos do cliente mantido no Redis, recorrendo ao banco se ele estiver indisponível.
+    Quando `db` é uma sessão da réplica, `db_primario` é usada para carregar o conjunto.
     """
     logger.info(
         "Iniciando listagem de produto favoritos",
         client_id=cliente.id
     )
-    count = (
-        select(func.count(ProdutoFavorito.produto_id))
-        .where(ProdutoFavorito.cliente_id == cliente.id)
+    apos = decodificar_cursor(cursor) if cursor is not None else None
+    deslocamento = (pagina - 1) * tamanho
+
+    pagina_favoritos = None
+    if settings.FAVORITOS_CACHE_REDIS:
+        pagina_favoritos = await cache_favoritos_servico.obter_pagina(
+            db_primario or db, cliente.id, deslocamento=deslocamento, limite=tamanho + 1, apos=apos
+        )
+    if pagina_favoritos is None:
+        pagina_favoritos = await _buscar_pagina_no_bd(
+            db, cliente.id, deslocamento=deslocamento, limite=tamanho + 1, apos=apos
+        )
+    favoritos, total_favoritos = pagina_favoritos
+
+    proximo_cursor = None
+    if len(favoritos) > tamanho:
+        favoritos = favoritos[:tamanho]
+        ultimo_id, ultimo_created_at = favoritos[-1]
+        proximo_cursor = codificar_cursor(ultimo_created_at, ultimo_id)
+
+    if not favoritos:
+        return [], total_favoritos, None
+
+    ids_produtos_favoritos = [produto_id for produto_id, _ in favoritos]
+    resultados_produtos = await cliente_api_produtos.obter_detalhes_produtos(ids_produtos_favoritos)
+    produtos_detalhados = [produto for produto in resultados_produtos if produto is not None]
+
+    logger.info(
+        "Listagem de produtos favoritos concluída",
+        client_id=cliente.id,
     )
+    return produtos_detalhados, total_favoritos, proximo_cursor
+
+async def _buscar_pagina_no_bd(
+    db: AsyncSession,
+    cliente_id: uuid.UUID,
+    deslocamento: int,
+    limite: int,
+    apos: tuple[datetime, str] | None,
+) -> tuple[list[tuple[str, datetime]], int]:
+    """Busca no banco uma página de favoritos, como pares (produto_id, created_at), e o total."""
+    count = select(Cliente.total_favoritos).where(Cliente.id == cliente_id)
     resultado_count = await db.execute(count)
     total_favoritos = resultado_count.scalar_one()
 
     if total_favoritos == 0:
         return [], 0
 
-    offset = (pagina - 1) * tamanho
     consulta = (
-        select(ProdutoFavorito.produto_id)
-        .where(ProdutoFavorito.cliente_id == cliente.id)
-        .offset(offset)
-        .limit(tamanho)
+        select(ProdutoFavorito.produto_id, ProdutoFavorito.created_at)
+        .where(ProdutoFavorito.cliente_id == cliente_id)
+        .order_by(ProdutoFavorito.created_at, ProdutoFavorito.produto_id)
+        .limit(limite)
     )
+    if apos is not None:
+        consulta = consulta.where(tuple_(ProdutoFavorito.created_at, ProdutoFavorito.produto_id) > tuple_(*apos))
+    else:
+        consulta = consulta.offset(deslocamento)
     resultado = await db.execute(consulta)
-    ids_produtos_favoritos = resultado.scalars().all()
-
-    if not ids_produtos_favoritos:
-        return [], total_favoritos
+    return list(resultado.all()), total_favoritos
 
-    tarefas_produtos = [
-        cliente_api_produtos.obter_detalhes_produto(id_produto) for id_produto in ids_produtos_favoritos
-    ]
-    resultados_produtos = await asyncio.gather(*tarefas_produtos)
-    produtos_detalhados = [produto for produto in resultados_produtos if produto is not None]
+async def exportar_favoritos(
+    fabrica_sessao: async_sessionmaker[AsyncSession],
+    cliente_id: uuid.UUID,
+    cliente_api_produtos: ClienteApiProdutos,
+    tamanho_lote: int | None = None,
+) -> AsyncIterator[str]:
+    """
+    Gera, em NDJSON, todos os produtos favoritos do cliente em ordem de inclusão.
+    Os favoritos são lidos com um cursor no servidor e enriquecidos em lotes na API
+    de produtos, de modo que a memória usada não depende do tamanho da lista.
+    Abre a própria sessão, pois é consumido depois que as dependências da requisição já foram encerradas.
+    """
+    tamanho_lote = tamanho_lote or settings.FAVORITOS_EXPORTACAO_TAMANHO_LOTE
+    logger.info("Iniciando exportação dos produtos favoritos", client_id=cliente_id)
+    consulta = (
+        select(ProdutoFavorito.produto_id)
+        .where(ProdutoFavorito.cliente_id == cliente_id)
+        .order_by(ProdutoFavorito.created_at, ProdutoFavorito.produto_id)
+        .execution_options(yield_per=tamanho_lote)
+    )
+    total_exportados = 0
+    async with fabrica_sessao() as db:
+        resultado = await db.stream_scalars(consulta)
+        async for ids_produtos in resultado.partitions(tamanho_lote):
+            produtos = await cliente_api_produtos.obter_detalhes_produtos(list(ids_produtos))
+            linhas = [
+                ProdutoSchema.model_validate(produto).model_dump_json() + "\n"
+                for produto in produtos if produto is not None
+            ]
+            total_exportados += len(linhas)
+            yield "".join(linhas)
 
     logger.info(
-        "Listagem de produtos favoritos concluída",
-        client_id=cliente.id,
+        "Exportação dos produtos favoritos concluída",
+        client_id=cliente_id,
+        total_exportados=total_exportados
     )
-    return produtos_detalhados, total_favoritos
 
 async def adicionar_favorito(
     db: AsyncSession,
@@ -71,6 +183,8 @@ async def adicionar_favorito(
 ) -> ProdutoFavorito:
     """
     Adiciona um novo produto à lista de favoritos de um cliente.
+    A gravação é um único INSERT ... ON CONFLICT DO NOTHING RETURNING: se nenhuma
+    linha for retornada, o produto já estava na lista.
     """
     cliente_id_str = str(cliente.id)
     logger.info(
@@ -90,47 +204,63 @@ async def adicionar_favorito(
             detail="Produto não encontrado na API externa."
         )
 
-    novo_favorito = ProdutoFavorito(cliente_id=cliente.id, produto_id=produto_id)
-    db.add(novo_favorito)
-
-    try:
+    insercao = (
+        insert_do_dialeto(db, ProdutoFavorito)
+        .values(cliente_id=cliente.id, produto_id=produto_id)
+        .on_conflict_do_nothing(index_elements=["cliente_id", "produto_id"])
+        .returning(ProdutoFavorito)
+    )
+    novo_favorito = await db.scalar(insercao)
+    if novo_favorito is None:
         await db.commit()
-        await db.refresh(novo_favorito)
-        logger.info(
-            "Produto adicionado aos favoritos com sucesso",
-            client_id=cliente_id_str,
-            produto_id=produto_id
-        )
-        return novo_favorito
-    except IntegrityError as err:
-        await db.rollback()
         logger.warn(
             "Erro ao adicionar favorito: produto já existe na lista",
             client_id=cliente_id_str,
             produto_id=produto_id
         )
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Este produto já está na lista de favoritos do cliente.",
-        ) from err
+        raise _erro_favorito_duplicado()
+
+    await db.execute(_atualizar_contador(cliente.id, 1))
+    await db.commit()
+    await marcar_escrita_recente(cliente.id)
+
+    if settings.FAVORITOS_CACHE_REDIS:
+        await cache_favoritos_servico.adicionar(cliente.id, [(produto_id, novo_favorito.created_at)])
+    logger.info(
+        "Produto adicionado aos favoritos com sucesso",
+        client_id=cliente_id_str,
+        produto_id=produto_id
+    )
+    return novo_favorito
+
+def _erro_favorito_duplicado() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Este produto já está na lista de favoritos do cliente.",
+    )
 
 async def remover_favorito(db: AsyncSession, cliente: Cliente, produto_id: str):
     """
-    Remove um produto da lista de favoritos de um cliente.
+    Remove um produto da lista de favoritos de um cliente com um único DELETE ... RETURNING,
+    lançando 404 quando nenhum favorito corresponde.
     """
     logger.info(
         "Iniciando remoção de produto dos favoritos",
         client_id=cliente.id,
         produto_id=produto_id
     )
-    consulta = select(ProdutoFavorito).where(
-        ProdutoFavorito.cliente_id == cliente.id,
-        ProdutoFavorito.produto_id == produto_id
+    remocao = (
+        delete(ProdutoFavorito)
+        .where(
+            ProdutoFavorito.cliente_id == cliente.id,
+            ProdutoFavorito.produto_id == produto_id
+        )
+        .returning(ProdutoFavorito.id)
+        .execution_options(synchronize_session=False)
     )
-    resultado = await db.execute(consulta)
-    favorito_a_remover = resultado.scalars().first()
+    id_removido = await db.scalar(remocao)
 
-    if not favorito_a_remover:
+    if id_removido is None:
         logger.warn(
             "Tentativa de remover produto não encontrado nos favoritos",
             client_id=cliente.id,
@@ -141,10 +271,161 @@ async def remover_favorito(db: AsyncSession, cliente: Cliente, produto_id: str):
             detail="Produto não encontrado na lista de favoritos do cliente."
         )
 
-    await db.delete(favorito_a_remover)
+    await db.execute(_atualizar_contador(cliente.id, -1))
     await db.commit()
+    await marcar_escrita_recente(cliente.id)
+    if settings.FAVORITOS_CACHE_REDIS:
+        await cache_favoritos_servico.remover(cliente.id, [produto_id])
     logger.info(
         "Produto removido dos favoritos com sucesso",
         client_id=cliente.id,
         produto_id=produto_id
     )
+
+async def adicionar_favoritos_em_lote(
+    db: AsyncSession,
+    cliente: Cliente,
+    produto_ids: list[str],
+    cliente_api_produtos: ClienteApiProdutos
+) -> list[ResultadoItemLote]:
+    """
+    Adiciona vários produtos aos favoritos de um cliente de uma só vez.
+    Os produtos são validados em conjunto na API externa (aproveitando o cache) e gravados
+    em um único INSERT ... ON CONFLICT DO NOTHING. Retorna a situação de cada produto.
+    """
+    produto_ids = list(dict.fromkeys(produto_ids))
+    logger.info(
+        "Iniciando adição de produtos aos favoritos em lote",
+        client_id=cliente.id,
+        quantidade=len(produto_ids)
+    )
+    detalhes_produtos = await cliente_api_produtos.obter_detalhes_produtos(produto_ids)
+    ids_existentes = [
+        produto_id for produto_id, produto in zip(produto_ids, detalhes_produtos, strict=True)
+        if produto is not None
+    ]
+
+    adicionados = {}
+    if ids_existentes:
+        insercao = (
+            insert_do_dialeto(db, ProdutoFavorito)
+            .values([
+                {"id": uuid.uuid4(), "cliente_id": cliente.id, "produto_id": produto_id}
+                for produto_id in ids_existentes
+            ])
+            .on_conflict_do_nothing(index_elements=["cliente_id", "produto_id"])
+            .returning(ProdutoFavorito.produto_id, ProdutoFavorito.created_at)
+        )
+        adicionados = dict((await db.execute(insercao)).all())
+        if adicionados:
+            await db.execute(_atualizar_contador(cliente.id, len(adicionados)))
+        await db.commit()
+        if adicionados:
+            await marcar_escrita_recente(cliente.id)
+
+    if settings.FAVORITOS_CACHE_REDIS and adicionados:
+        await cache_favoritos_servico.adicionar(cliente.id, list(adicionados.items()))
+
+    ids_existentes = set(ids_existentes)
+    resultados = []
+    for produto_id in produto_ids:
+        if produto_id in adicionados:
+            situacao = SituacaoItemLote.ADICIONADO
+        elif produto_id in ids_existentes:
+            situacao = SituacaoItemLote.JA_FAVORITO
+        else:
+            situacao = SituacaoItemLote.PRODUTO_NAO_ENCONTRADO
+        resultados.append(ResultadoItemLote(produto_id=produto_id, situacao=situacao))
+
+    logger.info(
+        "Adição de produtos aos favoritos em lote concluída",
+        client_id=cliente.id,
+        total_adicionados=len(adicionados)
+    )
+    return resultados
+
+async def remover_favoritos_em_lote(
+    db: AsyncSession,
+    cliente: Cliente,
+    produto_ids: list[str]
+) -> list[ResultadoItemLote]:
+    """
+    Remove vários produtos dos favoritos de um cliente com um único DELETE.
+    Retorna a situação de cada produto.
+    """
+    produto_ids = list(dict.fromkeys(produto_ids))
+    logger.info(
+        "Iniciando remoção de produtos dos favoritos em lote",
+        client_id=cliente.id,
+        quantidade=len(produto_ids)
+    )
+    remocao = (
+        delete(ProdutoFavorito)
+        .where(
+            ProdutoFavorito.cliente_id == cliente.id,
+            ProdutoFavorito.produto_id.in_(produto_ids)
+        )
+        .returning(ProdutoFavorito.produto_id)
+        .execution_options(synchronize_session=False)
+    )
+    removidos = set((await db.execute(remocao)).scalars().all())
+    if removidos:
+        await db.execute(_atualizar_contador(cliente.id, -len(removidos)))
+    await db.commit()
+    if removidos:
+        await marcar_escrita_recente(cliente.id)
+
+    if settings.FAVORITOS_CACHE_REDIS and removidos:
+        await cache_favoritos_servico.remover(cliente.id, list(removidos))
+
+    logger.info(
+        "Remoção de produtos dos favoritos em lote concluída",
+        client_id=cliente.id,
+        total_removidos=len(removidos)
+    )
+    return [
+        ResultadoItemLote(
+            produto_id=produto_id,
+            situacao=SituacaoItemLote.REMOVIDO if produto_id in removidos else SituacaoItemLote.NAO_FAVORITO
+        )
+        for produto_id in produto_ids
+    ]
+
+async def reconciliar_contadores_favoritos(db: AsyncSession, tamanho_lote: int = 1000) -> int:
+    """
+    Recalcula, em lotes de clientes, o total de favoritos mantido em cada cliente a partir
+    da tabela de favoritos, corrigindo eventuais divergências. Retorna o número de clientes corrigidos.
+    """
+    logger.info("Iniciando reconciliação dos contadores de favoritos")
+    total_contado = (
+        select(func.count(ProdutoFavorito.id))
+        .where(ProdutoFavorito.cliente_id == Cliente.id)
+        .scalar_subquery()
+    )
+    ultimo_id = None
+    total_corrigidos = 0
+    while True:
+        consulta_lote = select(Cliente.id).order_by(Cliente.id).limit(tamanho_lote)
+        if ultimo_id is not None:
+            consulta_lote = consulta_lote.where(Cliente.id > ultimo_id)
+        ids_clientes = (await db.execute(consulta_lote)).scalars().all()
+        if not ids_clientes:
+            break
+
+        resultado = await db.execute(
+            update(Cliente)
+            .where(Cliente.id.in_(ids_clientes), Cliente.total_favoritos != total_contado)
+            .values(total_favoritos=total_contado)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        total_corrigidos += resultado.rowcount
+        ultimo_id = ids_clientes[-1]
+        logger.info(
+            "Lote da reconciliação dos contadores processado",
+            ultimo_cliente_id=str(ultimo_id),
+            total_corrigidos=total_corrigidos,
+        )
+
+    logger.info("Reconciliação dos contadores de favoritos concluída", total_corrigidos=total_corrigidos)
+    return total_corrigidos
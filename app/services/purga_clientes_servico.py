@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+import time
+from datetime import UTC, datetime, timedelta
+
+import structlog
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.core.single_flight import lock_distribuido
+from app.db.models import Cliente, ProdutoFavorito
+from app.db.session import AsyncSessionLocal
+from app.services import cache_favoritos_servico
+
+logger = structlog.get_logger(__name__)
+
+CHAVE_LOCK_PURGA = "lock:purga_clientes_excluidos"
+
+
+async def purgar_clientes_excluidos(
+    db: AsyncSession,
+    retencao_dias: int,
+    tamanho_lote: int,
+    excluir_clientes: bool = False,
+    pausa_segundos: float = 0.0,
+) -> dict[str, int]:
+    """
+    Remove os favoritos dos clientes excluídos logicamente há mais de `retencao_dias` e,
+    opcionalmente, os próprios clientes. Cada lote de até `tamanho_lote` linhas é removido
+    em uma transação curta, com uma pausa entre lotes para não disputar as tabelas com o tráfego.
+    Retorna a quantidade de favoritos e de clientes removidos.
+    """
+    inicio = time.monotonic()
+    limite_exclusao = datetime.now(UTC).replace(tzinfo=None) - timedelta(days=retencao_dias)
+    clientes_expirados = select(Cliente.id).where(
+        Cliente.deleted_at.is_not(None), Cliente.deleted_at < limite_exclusao
+    )
+    logger.info(
+        "Iniciando purga de clientes excluídos",
+        retencao_dias=retencao_dias,
+        excluir_clientes=excluir_clientes,
+    )
+
+    total_favoritos = 0
+    while True:
+        lote = (
+            select(ProdutoFavorito.id)
+            .where(ProdutoFavorito.cliente_id.in_(clientes_expirados))
+            .limit(tamanho_lote)
+        )
+        resultado = await db.execute(
+            delete(ProdutoFavorito)
+            .where(ProdutoFavorito.id.in_(lote))
+            .returning(ProdutoFavorito.cliente_id)
+            .execution_options(synchronize_session=False)
+        )
+        ids_clientes_removidos = resultado.scalars().all()
+        ids_clientes = set(ids_clientes_removidos)
+        if ids_clientes:
+            await db.execute(
+                update(Cliente)
+                .where(Cliente.id.in_(ids_clientes))
+                .values(total_favoritos=0)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        if not ids_clientes:
+            break
+
+        total_favoritos += len(ids_clientes_removidos)
+        if settings.FAVORITOS_CACHE_REDIS:
+            for cliente_id in ids_clientes:
+                with contextlib.suppress(Exception):
+                    await cache_favoritos_servico.descartar(cliente_id)
+        logger.info("Lote de favoritos de clientes excluídos removido", total_favoritos=total_favoritos)
+        await asyncio.sleep(pausa_segundos)
+
+    total_clientes = 0
+    while excluir_clientes:
+        resultado = await db.execute(
+            delete(Cliente)
+            .where(Cliente.id.in_(clientes_expirados.limit(tamanho_lote)))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if not resultado.rowcount:
+            break
+
+        total_clientes += resultado.rowcount
+        logger.info("Lote de clientes excluídos removido", total_clientes=total_clientes)
+        await asyncio.sleep(pausa_segundos)
+
+    logger.info(
+        "Purga de clientes excluídos concluída",
+        total_favoritos=total_favoritos,
+        total_clientes=total_clientes,
+        duration_ms=round((time.monotonic() - inicio) * 1000, 2),
+    )
+    return {"favoritos": total_favoritos, "clientes": total_clientes}
+
+async def executar_purga(
+    retencao_dias: int | None = None,
+    tamanho_lote: int | None = None,
+    excluir_clientes: bool | None = None,
+) -> dict[str, int]:
+    """Executa a purga com uma sessão própria, usando as configurações para os valores não informados."""
+    async with AsyncSessionLocal() as db:
+        return await purgar_clientes_excluidos(
+            db=db,
+            retencao_dias=settings.PURGA_RETENCAO_DIAS if retencao_dias is None else retencao_dias,
+            tamanho_lote=tamanho_lote or settings.PURGA_TAMANHO_LOTE,
+            excluir_clientes=settings.PURGA_EXCLUIR_CLIENTES if excluir_clientes is None else excluir_clientes,
+            pausa_segundos=settings.PURGA_PAUSA_ENTRE_LOTES_MS / 1000,
+        )
+
+async def executar_purga_periodica() -> None:
+    """
+    Executa a purga a cada `PURGA_INTERVALO_SEGUNDOS`. Um lock no Redis garante que apenas
+    um worker faça a purga por vez; os demais aguardam o próximo intervalo.
+    """
+    while True:
+        try:
+            async with lock_distribuido(
+                get_redis_client(), CHAVE_LOCK_PURGA, ttl_ms=settings.PURGA_INTERVALO_SEGUNDOS * 1000
+            ) as adquirido:
+                if adquirido:
+                    await executar_purga()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error("Erro na purga periódica de clientes excluídos", exc_info=True)
+        await asyncio.sleep(settings.PURGA_INTERVALO_SEGUNDOS)
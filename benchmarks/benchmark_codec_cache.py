@@ -0,0 +1,71 @@
+"""
+Compara os formatos de serialização do cache de produtos: tamanho gravado no Redis
+e custo de codificação/decodificação por valor.
+
+Os formatos com dependências opcionais (`orjson` para "json", `msgpack`) só são medidos
+com elas instaladas: poetry install --extras desempenho.
+
+Uso: python -m benchmarks.benchmark_codec_cache [--iteracoes N]
+"""
+import argparse
+import json
+import time
+
+from app.core.serializacao import CodecCache, msgpack, orjson
+
+PRODUTO = {
+    "produto": {
+        "ID": "1bf0f365-fbdd-4e21-9746-da27342207a9",
+        "title": "Cadeira de Escritório Ergonômica com Apoio de Braço Regulável",
+        "brand": "Marca de Exemplo",
+        "image": "https://images.example.com/produtos/1bf0f365-fbdd-4e21-9746-da27342207a9.jpg",
+        "price": 1299.9,
+        "reviewScore": 4.7,
+    },
+    "atualizado_em": 1760745600.123456,
+}
+
+
+def medir(nome: str, codificar, decodificar, iteracoes: int) -> None:
+    dados = codificar(PRODUTO)
+
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        codificar(PRODUTO)
+    tempo_codificacao = (time.perf_counter() - inicio) / iteracoes * 1_000_000
+
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        decodificar(dados)
+    tempo_decodificacao = (time.perf_counter() - inicio) / iteracoes * 1_000_000
+
+    print(f"{nome:<32}{len(dados):>8}{tempo_codificacao:>16.2f}{tempo_decodificacao:>18.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iteracoes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'formato':<32}{'bytes':>8}{'codificar (µs)':>16}{'decodificar (µs)':>18}")
+    medir("json texto (anterior)", json.dumps, json.loads, args.iteracoes)
+
+    medir(
+        "json stdlib compacto",
+        lambda valor: json.dumps(valor, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+        json.loads,
+        args.iteracoes,
+    )
+
+    formatos = [("json", 0), ("json", 64)]
+    if msgpack is not None:
+        formatos += [("msgpack", 0), ("msgpack", 64)]
+    for formato, limite in formatos:
+        codec = CodecCache(formato=formato, limite_compressao_bytes=limite)
+        nome = "json (orjson)" if formato == "json" and orjson is not None else formato
+        nome = f"{nome} + zlib (> {limite} B)" if limite else nome
+        medir(nome, codec.codificar, codec.decodificar, args.iteracoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Mede o tempo de verificação de senha para cada custo do esquema de hash, e a capacidade
+de logins por segundo que isso representa por worker, para dimensionar `SENHA_HASH_CUSTO`
+e `SENHA_HASH_MAX_THREADS`. A estimativa com várias threads supõe uma CPU livre por thread.
+
+Uso: python -m benchmarks.benchmark_custo_hash_senha [--esquema bcrypt] [--custos 10 11 12 13] [--iteracoes N]
+"""
+import argparse
+import time
+
+from app.core import security
+from app.core.config import settings
+
+SENHA = "senha-do-benchmark"
+
+CUSTOS_PADRAO = {
+    "bcrypt": [10, 11, 12, 13],
+    "argon2": [2, 3, 4],
+    "pbkdf2_sha256": [100_000, 300_000, 600_000],
+}
+
+
+def medir(esquema: str, custo: int, iteracoes: int, threads: int) -> None:
+    contexto = security.criar_contexto_senhas(
+        esquema, custo=custo, argon2_memoria_kb=settings.SENHA_HASH_ARGON2_MEMORIA_KB
+    )
+    hash_senha = contexto.hash(SENHA)
+
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        contexto.verify(SENHA, hash_senha)
+    tempo_verificacao = (time.perf_counter() - inicio) / iteracoes
+
+    print(
+        f"{esquema:<16}{custo:>10}{tempo_verificacao * 1000:>18.1f}"
+        f"{1 / tempo_verificacao:>16.1f}{threads / tempo_verificacao:>22.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--esquema", default=settings.SENHA_HASH_ESQUEMA, choices=sorted(CUSTOS_PADRAO))
+    parser.add_argument("--custos", type=int, nargs="+", default=None)
+    parser.add_argument("--iteracoes", type=int, default=5)
+    args = parser.parse_args()
+
+    threads = settings.SENHA_HASH_MAX_THREADS
+    print(
+        f"{'esquema':<16}{'custo':>10}{'verificação (ms)':>18}{'logins/s/thread':>16}"
+        f"{f'logins/s ({threads} threads)':>22}"
+    )
+    for custo in args.custos or CUSTOS_PADRAO[args.esquema]:
+        medir(args.esquema, custo, args.iteracoes, threads)
+
+
+if __name__ == "__main__":
+    main()
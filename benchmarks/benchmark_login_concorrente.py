@@ -0,0 +1,72 @@
+"""
+Mede o efeito de uma rajada de logins sobre as demais requisições do mesmo worker:
+compara a verificação de senha (bcrypt) executada diretamente no event loop com a
+executada no pool de threads de senhas.
+
+Enquanto os logins são processados, uma requisição "leve" (que só aguarda 1 ms) é
+disparada continuamente; sua latência mostra quanto o event loop ficou bloqueado.
+
+Uso: python -m benchmarks.benchmark_login_concorrente [--logins N] [--threads N]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.core import security
+
+SENHA = "senha-do-benchmark"
+
+
+async def login_no_event_loop(hash_senha: str) -> None:
+    security.verificar_senha(SENHA, hash_senha)
+
+async def login_no_pool_de_threads(hash_senha: str) -> None:
+    await security.verificar_senha_async(SENHA, hash_senha)
+
+
+async def medir(nome: str, login, hash_senha: str, logins: int) -> None:
+    latencias = []
+    terminou = asyncio.Event()
+
+    async def requisicoes_leves() -> None:
+        while not terminou.is_set():
+            inicio = time.perf_counter()
+            await asyncio.sleep(0.001)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    tarefa = asyncio.create_task(requisicoes_leves())
+    await asyncio.sleep(0)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(login(hash_senha) for _ in range(logins)))
+    duracao = time.perf_counter() - inicio
+    terminou.set()
+    await tarefa
+
+    percentil_99 = statistics.quantiles(latencias, n=100)[98] if len(latencias) > 1 else latencias[0]
+    print(
+        f"{nome:<20}{duracao:>12.2f}{logins / duracao:>12.1f}"
+        f"{len(latencias):>12}{percentil_99:>14.2f}{max(latencias):>14.2f}"
+    )
+
+
+async def executar(logins: int) -> None:
+    hash_senha = security.gerar_hash_senha(SENHA)
+    print(f"{'modo':<20}{'total (s)':>12}{'logins/s':>12}{'req. leves':>12}{'p99 (ms)':>14}{'máximo (ms)':>14}")
+    await medir("event loop", login_no_event_loop, hash_senha, logins)
+    await medir("pool de threads", login_no_pool_de_threads, hash_senha, logins)
+    security.encerrar_executor_senhas()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=None, help="sobrescreve SENHA_HASH_MAX_THREADS")
+    args = parser.parse_args()
+    if args.threads is not None:
+        security.settings.SENHA_HASH_MAX_THREADS = args.threads
+    asyncio.run(executar(args.logins))
+
+
+if __name__ == "__main__":
+    main()
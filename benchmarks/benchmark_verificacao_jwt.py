@@ -0,0 +1,46 @@
+"""
+Compara o custo por chamada da verificação de tokens JWT: `jose.jwt.decode` (caminho anterior),
+`security.verificar_token` sem cache e `security.verificar_token` com o token já em cache.
+
+Uso: python -m benchmarks.benchmark_verificacao_jwt [--iteracoes N]
+"""
+import argparse
+import time
+
+from jose import jwt
+
+from app.core import security
+from app.core.config import settings
+
+
+def medir(nome: str, verificar, iteracoes: int) -> None:
+    inicio = time.perf_counter()
+    for _ in range(iteracoes):
+        verificar()
+    tempo_por_chamada = (time.perf_counter() - inicio) / iteracoes * 1_000_000
+    print(f"{nome:<32}{tempo_por_chamada:>14.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iteracoes", type=int, default=20_000)
+    args = parser.parse_args()
+
+    token = security.gerar_token(subject="1bf0f365-fbdd-4e21-9746-da27342207a9")
+
+    def verificar_sem_cache():
+        security.cache_tokens_verificados.limpar()
+        return security.verificar_token(token)
+
+    print(f"{'verificação':<32}{'por chamada (µs)':>14}")
+    medir(
+        "jose.jwt.decode (anterior)",
+        lambda: jwt.decode(token, settings.CHAVE_SEGURANCA_JWT, algorithms=[security.ALGORITHM]),
+        args.iteracoes,
+    )
+    medir("verificar_token (sem cache)", verificar_sem_cache, args.iteracoes)
+    medir("verificar_token (em cache)", lambda: security.verificar_token(token), args.iteracoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Adiciona ordenacao estavel aos favoritos
+
+Revision ID: 4f6a9c2d8e17
+Revises: c2149af5890d
+Create Date: 2026-10-18 10:12:31.402918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6a9c2d8e17'
+down_revision: Union[str, Sequence[str], None] = 'c2149af5890d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('produto_favorito', sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+    op.create_index('ix_produto_favorito_cliente_id_created_at', 'produto_favorito', ['cliente_id', 'created_at', 'produto_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_produto_favorito_cliente_id_created_at', table_name='produto_favorito')
+    op.drop_column('produto_favorito', 'created_at')
@@ -0,0 +1,32 @@
+"""Adiciona contador de favoritos ao cliente
+
+Revision ID: 9b3e51d07c42
+Revises: 4f6a9c2d8e17
+Create Date: 2026-10-18 11:05:47.218306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e51d07c42'
+down_revision: Union[str, Sequence[str], None] = '4f6a9c2d8e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cliente', sa.Column('total_favoritos', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE cliente SET total_favoritos = "
+        "(SELECT count(*) FROM produto_favorito WHERE produto_favorito.cliente_id = cliente.id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('cliente', 'total_favoritos')
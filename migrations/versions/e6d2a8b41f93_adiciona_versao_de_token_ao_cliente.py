@@ -0,0 +1,28 @@
+"""Adiciona versão de token ao cliente
+
+Revision ID: e6d2a8b41f93
+Revises: 9b3e51d07c42
+Create Date: 2026-10-18 14:22:09.531870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6d2a8b41f93'
+down_revision: Union[str, Sequence[str], None] = '9b3e51d07c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('cliente', sa.Column('versao_token', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('cliente', 'versao_token')
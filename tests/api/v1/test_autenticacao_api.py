@@ -1,6 +1,14 @@
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import security
+from app.core.config import settings
 from app.db.models import Cliente
+from app.services import autenticacao_servico, cache_cliente_servico, cliente_servico
 
 
 def test_login_sucesso(client: TestClient, test_cliente: Cliente):
@@ -30,3 +38,150 @@ def test_login_email_invalido(client: TestClient):
         data={"username": "naoexiste@exemplo.com", "password": "senha_teste"},
     )
     assert response.status_code == 401
+
+def test_login_limite_de_tentativas_excedido(client: TestClient, test_cliente: Cliente, mocker):
+    """Testa que o login é rejeitado com 429 quando o limite de tentativas é excedido."""
+    mocker.patch.object(autenticacao_servico.limitador_login, "consumir", AsyncMock(return_value=30))
+    autenticar = mocker.spy(autenticacao_servico, "autenticar_cliente")
+
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": "teste@exemplo.com", "password": "senha_teste"},
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    autenticar.assert_not_called()
+
+@pytest.mark.parametrize(
+    ("cabecalho_configurado", "cabecalhos", "ip_esperado"),
+    [
+        (None, {"X-Real-IP": "203.0.113.7"}, "testclient"),
+        ("X-Real-IP", {"X-Real-IP": "203.0.113.7"}, "203.0.113.7"),
+        ("X-Forwarded-For", {"X-Forwarded-For": "1.2.3.4, 203.0.113.7"}, "203.0.113.7"),
+        ("X-Real-IP", {}, "testclient"),
+    ],
+    ids=["sem_cabecalho_configurado", "cabecalho_configurado", "ultimo_da_lista", "cabecalho_ausente"],
+)
+def test_login_limite_por_ip_usa_o_cabecalho_configurado(
+    client: TestClient, test_cliente: Cliente, mocker, cabecalho_configurado, cabecalhos, ip_esperado
+):
+    """Testa que o IP do limite de tentativas vem do cabeçalho do balanceador, quando configurado."""
+    mocker.patch.object(settings, "LOGIN_CABECALHO_IP_CLIENTE", cabecalho_configurado)
+    verificar_limite = mocker.patch.object(autenticacao_servico, "verificar_limite_login", AsyncMock())
+
+    client.post(
+        "/api/v1/auth/token",
+        data={"username": "teste@exemplo.com", "password": "senha_teste"},
+        headers=cabecalhos,
+    )
+    verificar_limite.assert_awaited_once_with(email="teste@exemplo.com", ip=ip_esperado)
+
+def test_renovar_token(client: TestClient, test_cliente: Cliente, auth_headers: dict):
+    """Testa a troca do token de atualização por um novo par e a sua revogação após a exclusão do cliente."""
+    tokens = client.post(
+        "/api/v1/auth/token",
+        data={"username": "teste@exemplo.com", "password": "senha_teste"},
+    ).json()
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    assert set(response.json()) == {"access_token", "refresh_token", "token_type"}
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+    response = client.get(
+        f"/api/v1/clientes/{test_cliente.id}",
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+    )
+    assert response.status_code == 401
+
+    client.delete(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+def test_autorizacao_sem_consulta_ao_banco(client: TestClient, test_cliente: Cliente, auth_headers: dict, mocker):
+    """Testa a autorização apenas pelo token, com a revogação verificada pela versão de token publicada."""
+    mocker.patch("app.api.v1.rotas.autenticacao_api.settings.AUTORIZACAO_SEM_CONSULTA_BD", True)
+    obter_versao_token = mocker.patch.object(
+        cache_cliente_servico, "obter_versao_token", AsyncMock(return_value=0)
+    )
+    recuperar_cliente = mocker.spy(cliente_servico, "recuperar_cliente_em_cache")
+
+    response = client.get(f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers)
+    assert response.status_code == 200
+    recuperar_cliente.assert_not_called()
+
+    obter_versao_token.return_value = 1
+    response = client.get(f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers)
+    assert response.status_code == 401
+
+@pytest.fixture
+def redis_versoes_token(monkeypatch, mocker) -> fakeredis.FakeRedis:
+    """
+    Autorização sem consulta ao banco, com as versões de token em um Redis em memória.
+    Retorna um cliente síncrono do mesmo Redis para as verificações do teste.
+    """
+    servidor = fakeredis.FakeServer()
+    redis = fakeredis.FakeAsyncRedis(server=servidor, decode_responses=True)
+    monkeypatch.setattr(cache_cliente_servico, "get_redis_client", lambda: redis)
+    mocker.patch.object(settings, "AUTORIZACAO_SEM_CONSULTA_BD", True)
+    return fakeredis.FakeRedis(server=servidor, decode_responses=True)
+
+def test_autorizacao_sem_consulta_ao_banco_com_versao_desconhecida(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, redis_versoes_token, mocker
+):
+    """
+    Testa que, sem versão publicada (como após um flush do Redis), a autorização consulta o banco
+    e republica a versão, e que a revogação da exclusão vale mesmo se a chave for perdida depois.
+    """
+    recuperar_cliente = mocker.spy(cliente_servico, "recuperar_cliente_em_cache")
+    url_favoritos = f"/api/v1/clientes/{test_cliente.id}/favoritos/"
+
+    assert client.get(url_favoritos, headers=auth_headers).status_code == 200
+    assert recuperar_cliente.await_count == 1
+    assert redis_versoes_token.get(f"versao_token:{test_cliente.id}") == "0"
+
+    assert client.get(url_favoritos, headers=auth_headers).status_code == 200
+    assert recuperar_cliente.await_count == 1
+
+    assert client.delete(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers).status_code == 204
+    assert redis_versoes_token.get(f"versao_token:{test_cliente.id}") == "1"
+    assert client.get(url_favoritos, headers=auth_headers).status_code == 401
+
+    redis_versoes_token.flushall()
+    assert client.get(url_favoritos, headers=auth_headers).status_code == 401
+    assert recuperar_cliente.await_count == 2
+
+def test_excluir_cliente_falha_sem_publicar_a_revogacao(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, redis_versoes_token, mocker
+):
+    """Testa que, sem conseguir publicar a nova versão de token, a exclusão é desfeita e retorna 503."""
+    mocker.patch.object(
+        cache_cliente_servico, "registrar_versao_token", AsyncMock(side_effect=ConnectionError("Redis indisponível"))
+    )
+
+    cliente_id = test_cliente.id
+
+    response = client.delete(f"/api/v1/clientes/{cliente_id}", headers=auth_headers)
+    assert response.status_code == 503
+
+    response = client.get(f"/api/v1/clientes/{cliente_id}", headers=auth_headers)
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_login_atualiza_hash_com_custo_desatualizado(
+    client: TestClient, test_cliente: Cliente, db_session: AsyncSession, mocker
+):
+    """Testa que o hash da senha é regravado com o custo configurado após um login bem-sucedido."""
+    mocker.patch.object(security, "pwd_context", security.criar_contexto_senhas("bcrypt", custo=4))
+
+    response = client.post(
+        "/api/v1/auth/token",
+        data={"username": "teste@exemplo.com", "password": "senha_teste"},
+    )
+    assert response.status_code == 200
+
+    await db_session.refresh(test_cliente)
+    assert test_cliente.hash_senha.startswith("$2b$04$")
+    assert security.verificar_senha("senha_teste", test_cliente.hash_senha)
@@ -1,8 +1,16 @@
+import uuid
+from unittest.mock import AsyncMock
+
+import fakeredis
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import AUSENTE
+from app.core.config import settings
 from app.db.models import Cliente
+from app.services import cache_cliente_servico, cliente_servico
 
 
 def test_criar_cliente_sucesso(client: TestClient):
@@ -24,6 +32,58 @@ def test_criar_cliente_email_duplicado(client: TestClient, test_cliente: Cliente
     )
     assert response.status_code == 409
 
+def test_criar_cliente_senha_valida(client: TestClient):
+    """Testa o cadastro de um cliente com um e-mail novo e uma senha válida."""
+    response = client.post(
+        "/api/v1/clientes/",
+        json={"nome": "Novo Cliente", "email": "novo@exemplo.com", "senha": "senha_valida"}
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["email"] == "novo@exemplo.com"
+    assert "id" in data
+    assert "senha" not in data and "hash_senha" not in data
+
+def test_criar_cliente_marca_escrita_recente(client: TestClient, mocker):
+    """Testa que o cadastro direciona as leituras seguintes do novo cliente ao primário."""
+    marcar_escrita_recente = mocker.patch.object(cliente_servico, "marcar_escrita_recente", AsyncMock())
+
+    response = client.post(
+        "/api/v1/clientes/",
+        json={"nome": "Novo Cliente", "email": "novo@exemplo.com", "senha": "senha_valida"}
+    )
+    assert response.status_code == 201
+    marcar_escrita_recente.assert_awaited_once_with(uuid.UUID(response.json()["id"]))
+
+def test_criar_cliente_email_de_cliente_ativo(client: TestClient, test_cliente: Cliente):
+    """Testa que o e-mail de um cliente ativo não pode ser usado em um novo cadastro."""
+    response = client.post(
+        "/api/v1/clientes/",
+        json={"nome": "Outro Nome", "email": test_cliente.email, "senha": "senha_valida"}
+    )
+    assert response.status_code == 409
+
+@pytest.mark.asyncio
+async def test_criar_cliente_email_de_cliente_excluido(
+    client: TestClient,
+    test_cliente: Cliente,
+    auth_headers: dict,
+    db_session: AsyncSession
+):
+    """Testa que o e-mail de um cliente excluído logicamente pode ser usado em um novo cadastro."""
+    response = client.delete(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    assert response.status_code == 204
+
+    response = client.post(
+        "/api/v1/clientes/",
+        json={"nome": "Outro Nome", "email": test_cliente.email, "senha": "senha_valida"}
+    )
+    assert response.status_code == 201
+    assert response.json()["id"] != str(test_cliente.id)
+
+    resultado = await db_session.execute(select(Cliente).where(Cliente.email == test_cliente.email))
+    assert len(resultado.scalars().all()) == 2
+
 def test_recuperar_cliente_autorizado(client: TestClient, test_cliente: Cliente, auth_headers: dict):
     """Testa recuperar os próprios dados quando autenticado."""
     response = client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
@@ -35,6 +95,18 @@ def test_recuperar_cliente_nao_autorizado(client: TestClient, test_cliente: Clie
     response = client.get(f"/api/v1/clientes/{test_cliente.id}")
     assert response.status_code == 401
 
+@pytest.mark.parametrize(
+    "token",
+    [b"token.malformado", "eyJhbGciOiJIUzI1NiJ9.páyload.c2lnbmF0dXJl".encode("latin-1")],
+    ids=["malformado", "nao_ascii"],
+)
+def test_recuperar_cliente_token_invalido(client: TestClient, test_cliente: Cliente, token: bytes):
+    """Testa que um token malformado ou com caracteres não ASCII é rejeitado com 401, e não 500."""
+    response = client.get(
+        f"/api/v1/clientes/{test_cliente.id}", headers={"Authorization": b"Bearer " + token}
+    )
+    assert response.status_code == 401
+
 def test_atualizar_cliente_sucesso(client: TestClient, test_cliente: Cliente, auth_headers: dict):
     """Testa a atualização bem-sucedida dos próprios dados."""
     response = client.put(
@@ -47,6 +119,32 @@ def test_atualizar_cliente_sucesso(client: TestClient, test_cliente: Cliente, au
     assert data["nome"] == "Nome Atualizado"
     assert data["email"] == "email.atualizado@exemplo.com"
 
+@pytest.mark.asyncio
+async def test_atualizar_cliente_excluido_sem_consulta_ao_banco(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, db_session: AsyncSession, mocker
+):
+    """
+    Testa que, na autorização apenas pelo token, a atualização de um cliente já excluído
+    retorna 404 em vez de alterá-lo.
+    """
+    mocker.patch.object(settings, "AUTORIZACAO_SEM_CONSULTA_BD", True)
+    mocker.patch.object(cache_cliente_servico, "obter_versao_token", AsyncMock(return_value=0))
+    cliente_id = test_cliente.id
+    await db_session.execute(
+        update(Cliente).where(Cliente.id == cliente_id).values(deleted_at=func.now())
+    )
+    await db_session.commit()
+
+    response = client.put(
+        f"/api/v1/clientes/{cliente_id}",
+        headers=auth_headers,
+        json={"nome": "Nome Atualizado", "email": "email.atualizado@exemplo.com"}
+    )
+    assert response.status_code == 404
+
+    nome = await db_session.scalar(select(Cliente.nome).where(Cliente.id == cliente_id))
+    assert nome == "Cliente de Teste"
+
 @pytest.mark.asyncio
 async def test_excluir_cliente_sucesso(
     client: TestClient,
@@ -63,3 +161,68 @@ async def test_excluir_cliente_sucesso(
 
     response_depois = client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
     assert response_depois.status_code == 401
+
+@pytest.fixture
+def cache_clientes(monkeypatch, mocker) -> fakeredis.FakeRedis:
+    """
+    Habilita o cache de clientes sobre um Redis em memória, partindo de caches vazios.
+    Retorna um cliente síncrono do mesmo Redis para as verificações do teste.
+    """
+    servidor = fakeredis.FakeServer()
+    redis = fakeredis.FakeAsyncRedis(server=servidor, decode_responses=True)
+    monkeypatch.setattr(cache_cliente_servico, "get_redis_client", lambda: redis)
+    mocker.patch.object(settings, "CLIENTE_CACHE_TTL_SEGUNDOS", 60)
+    cache_cliente_servico.cache_local_clientes.limpar()
+    yield fakeredis.FakeRedis(server=servidor, decode_responses=True)
+    cache_cliente_servico.cache_local_clientes.limpar()
+
+def cliente_em_cache(cache_clientes: fakeredis.FakeRedis, cliente: Cliente) -> bool:
+    """Indica se o cliente está em algum dos níveis do cache."""
+    chave = f"cliente:{cliente.id}"
+    return bool(cache_clientes.exists(chave)) or (
+        cache_cliente_servico.cache_local_clientes.obter(chave) is not AUSENTE
+    )
+
+def test_cliente_logado_servido_pelo_cache(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, cache_clientes, mocker
+):
+    """Testa que, com o cache habilitado, o cliente logado é consultado no banco apenas uma vez."""
+    recuperar_cliente = mocker.spy(cliente_servico, "recuperar_cliente")
+
+    primeira = client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    cache_cliente_servico.cache_local_clientes.limpar()
+    segunda = client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    terceira = client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+
+    assert primeira.status_code == segunda.status_code == terceira.status_code == 200
+    assert primeira.json() == segunda.json() == terceira.json()
+    assert recuperar_cliente.await_count == 1
+
+def test_atualizar_cliente_invalida_o_cache(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, cache_clientes
+):
+    """Testa que a atualização remove o cliente do cache e a leitura seguinte traz os novos dados."""
+    client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    assert cliente_em_cache(cache_clientes, test_cliente)
+
+    response = client.put(
+        f"/api/v1/clientes/{test_cliente.id}",
+        headers=auth_headers,
+        json={"nome": "Nome Atualizado", "email": test_cliente.email}
+    )
+    assert response.status_code == 200
+    assert not cliente_em_cache(cache_clientes, test_cliente)
+
+    response = client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    assert response.json()["nome"] == "Nome Atualizado"
+
+def test_excluir_cliente_invalida_o_cache(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, cache_clientes
+):
+    """Testa que a exclusão remove o cliente dos dois níveis do cache."""
+    client.get(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    assert cliente_em_cache(cache_clientes, test_cliente)
+
+    response = client.delete(f"/api/v1/clientes/{test_cliente.id}", headers=auth_headers)
+    assert response.status_code == 204
+    assert not cliente_em_cache(cache_clientes, test_cliente)
@@ -0,0 +1,23 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+URL_METRICAS = "/api/v1/healthcheck/metricas"
+
+
+def test_metricas_desabilitadas_por_padrao(client: TestClient):
+    """Testa que as métricas internas não são expostas nem documentadas por padrão."""
+    assert client.get(URL_METRICAS).status_code == 404
+    assert URL_METRICAS not in client.get("/openapi.json").json()["paths"]
+
+def test_metricas_exigem_a_chave_configurada(client: TestClient, mocker):
+    """Testa que, habilitadas e com chave configurada, as métricas só são retornadas com a chave correta."""
+    mocker.patch.object(settings, "METRICAS_HABILITADAS", True)
+    mocker.patch.object(settings, "CHAVE_METRICAS", "chave-metricas")
+
+    assert client.get(URL_METRICAS).status_code == 401
+    assert client.get(URL_METRICAS, headers={"X-Chave-Metricas": "outra"}).status_code == 401
+
+    response = client.get(URL_METRICAS, headers={"X-Chave-Metricas": "chave-metricas"})
+    assert response.status_code == 200
+    assert "pool_banco_de_dados" in response.json()
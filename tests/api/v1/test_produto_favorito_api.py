@@ -1,8 +1,13 @@
+import json
+from datetime import datetime
 from unittest.mock import AsyncMock
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Cliente
+from app.db.models import Cliente, ProdutoFavorito
+from app.services import produto_favorito_servico
 
 PRODUTO_ID_TESTE = "1bf0f365-fbdd-4e21-9746-da27342207a9"
 
@@ -23,6 +28,19 @@ def test_adicionar_favorito_sucesso(
     assert response.status_code == 201
     assert response.json() == {"message": "Produto adicionado aos favoritos com sucesso."}
 
+def test_adicionar_favorito_duplicado(client: TestClient, test_cliente: Cliente, auth_headers: dict):
+    """Testa adicionar um produto que já está nos favoritos."""
+    for status_esperado in (201, 409):
+        response = client.post(
+            f"/api/v1/clientes/{test_cliente.id}/favoritos/",
+            headers=auth_headers,
+            json={"produto_id": PRODUTO_ID_TESTE}
+        )
+        assert response.status_code == status_esperado
+
+    response_listagem = client.get(f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers)
+    assert response_listagem.json()["total"] == 1
+
 def test_adicionar_favorito_produto_inexistente(
     client: TestClient,
     test_cliente: Cliente,
@@ -48,14 +66,14 @@ def test_listar_favoritos(client: TestClient, test_cliente: Cliente, auth_header
         json={"produto_id": PRODUTO_ID_TESTE}
     )
 
-    mock_cliente_api_produtos.obter_detalhes_produto = AsyncMock(return_value={
+    mock_cliente_api_produtos.obter_detalhes_produtos = AsyncMock(return_value=[{
         "ID": PRODUTO_ID_TESTE,
         "title": "Produto Teste",
         "brand": "Marca Teste",
         "image": "http://example.com/image.png",
         "price": 99.99,
         "reviewScore": 4.5
-    })
+    }])
 
     response = client.get(f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers)
     assert response.status_code == 200
@@ -75,6 +93,56 @@ def test_listar_favoritos(client: TestClient, test_cliente: Cliente, auth_header
     assert produto_favorito["ID"] == PRODUTO_ID_TESTE
     assert produto_favorito["title"] == "Produto Teste"
 
+@pytest.mark.asyncio
+async def test_listar_favoritos_com_cursor(
+    client: TestClient,
+    test_cliente: Cliente,
+    auth_headers: dict,
+    mock_cliente_api_produtos,
+    db_session: AsyncSession
+):
+    """Testa a paginação por cursor da listagem de produtos favoritos."""
+    for posicao, id_produto in enumerate(["produto-a", "produto-b", "produto-c"]):
+        db_session.add(ProdutoFavorito(
+            cliente_id=test_cliente.id,
+            produto_id=id_produto,
+            created_at=datetime(2025, 9, 10, 12, 0, 0, posicao)
+        ))
+    await db_session.commit()
+    assert await produto_favorito_servico.reconciliar_contadores_favoritos(db_session) == 1
+
+    mock_cliente_api_produtos.obter_detalhes_produtos = AsyncMock(side_effect=lambda ids: [{
+        "ID": id_produto,
+        "title": "Produto Teste",
+        "brand": "Marca Teste",
+        "image": "http://example.com/image.png",
+        "price": 99.99,
+    } for id_produto in ids])
+
+    response = client.get(
+        f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers, params={"tamanho": 2}
+    )
+    assert response.status_code == 200
+    primeira_pagina = response.json()
+    assert [produto["ID"] for produto in primeira_pagina["itens"]] == ["produto-a", "produto-b"]
+    assert primeira_pagina["proximo_cursor"] is not None
+
+    response = client.get(
+        f"/api/v1/clientes/{test_cliente.id}/favoritos/",
+        headers=auth_headers,
+        params={"tamanho": 2, "cursor": primeira_pagina["proximo_cursor"]}
+    )
+    assert response.status_code == 200
+    segunda_pagina = response.json()
+    assert [produto["ID"] for produto in segunda_pagina["itens"]] == ["produto-c"]
+    assert segunda_pagina["proximo_cursor"] is None
+    assert segunda_pagina["total"] == 3
+
+    response = client.get(
+        f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers, params={"cursor": "invalido"}
+    )
+    assert response.status_code == 400
+
 def test_remover_favorito(client: TestClient, test_cliente: Cliente, auth_headers: dict):
     """Testa a remoção de um produto dos favoritos."""
     client.post(
@@ -89,8 +157,87 @@ def test_remover_favorito(client: TestClient, test_cliente: Cliente, auth_header
     )
     assert response.status_code == 204
 
+    response_listagem = client.get(f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers)
+    assert response_listagem.json()["total"] == 0
+
     response_depois = client.delete(
         f"/api/v1/clientes/{test_cliente.id}/favoritos/{PRODUTO_ID_TESTE}",
         headers=auth_headers
     )
     assert response_depois.status_code == 404
+
+def test_adicionar_e_remover_favoritos_em_lote(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, mock_cliente_api_produtos
+):
+    """Testa a adição e a remoção de favoritos em lote, com o resultado de cada produto."""
+    client.post(
+        f"/api/v1/clientes/{test_cliente.id}/favoritos/",
+        headers=auth_headers,
+        json={"produto_id": "produto-a"}
+    )
+    mock_cliente_api_produtos.obter_detalhes_produtos = AsyncMock(side_effect=lambda ids: [
+        None if id_produto == "produto-inexistente" else {
+            "ID": id_produto,
+            "title": "Produto Teste",
+            "brand": "Marca Teste",
+            "image": "http://example.com/image.png",
+            "price": 99.99,
+        } for id_produto in ids
+    ])
+
+    response = client.post(
+        f"/api/v1/clientes/{test_cliente.id}/favoritos/lote",
+        headers=auth_headers,
+        json={"produto_ids": ["produto-a", "produto-b", "produto-inexistente", "produto-b"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["resultados"] == [
+        {"produto_id": "produto-a", "situacao": "ja_favorito"},
+        {"produto_id": "produto-b", "situacao": "adicionado"},
+        {"produto_id": "produto-inexistente", "situacao": "produto_nao_encontrado"},
+    ]
+
+    response = client.post(
+        f"/api/v1/clientes/{test_cliente.id}/favoritos/lote/remocao",
+        headers=auth_headers,
+        json={"produto_ids": ["produto-a", "produto-c"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["resultados"] == [
+        {"produto_id": "produto-a", "situacao": "removido"},
+        {"produto_id": "produto-c", "situacao": "nao_favorito"},
+    ]
+
+    response_listagem = client.get(f"/api/v1/clientes/{test_cliente.id}/favoritos/", headers=auth_headers)
+    assert response_listagem.json()["total"] == 1
+
+    response = client.post(
+        f"/api/v1/clientes/{test_cliente.id}/favoritos/lote", headers=auth_headers, json={"produto_ids": []}
+    )
+    assert response.status_code == 422
+
+def test_exportar_favoritos(
+    client: TestClient, test_cliente: Cliente, auth_headers: dict, mock_cliente_api_produtos
+):
+    """Testa a exportação em NDJSON de todos os favoritos do cliente."""
+    for id_produto in ["produto-a", "produto-b", "produto-c"]:
+        client.post(
+            f"/api/v1/clientes/{test_cliente.id}/favoritos/",
+            headers=auth_headers,
+            json={"produto_id": id_produto}
+        )
+    mock_cliente_api_produtos.obter_detalhes_produtos = AsyncMock(side_effect=lambda ids: [
+        None if id_produto == "produto-b" else {
+            "ID": id_produto,
+            "title": "Produto Teste",
+            "brand": "Marca Teste",
+            "image": "http://example.com/image.png",
+            "price": 99.99,
+        } for id_produto in ids
+    ])
+
+    response = client.get(f"/api/v1/clientes/{test_cliente.id}/favoritos/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    linhas = [json.loads(linha) for linha in response.text.splitlines()]
+    assert sorted(produto["ID"] for produto in linhas) == ["produto-a", "produto-c"]
@@ -1,5 +1,6 @@
 import uuid
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -10,7 +11,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.core import security
 from app.db.models import Base, Cliente, ProdutoFavorito
-from app.db.session import get_db
+from app.db.session import get_db, get_fabrica_sessao_leitura
 from app.main import app
 from app.services.api_produtos_servico import ClienteApiProdutos, obter_cliente_api_produtos
 
@@ -49,7 +50,12 @@ def sobrescrever_dependencias(db_session: AsyncSession, mock_cliente_api_produto
     def override_get_cliente_api_produtos() -> ClienteApiProdutos:
         return mock_cliente_api_produtos
 
+    @asynccontextmanager
+    async def fabrica_sessao_teste():
+        yield db_session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_fabrica_sessao_leitura] = lambda: fabrica_sessao_teste
     app.dependency_overrides[obter_cliente_api_produtos] = override_get_cliente_api_produtos
 
     yield
@@ -69,6 +75,7 @@ def mock_cliente_api_produtos() -> MagicMock:
     mock = MagicMock(spec=ClienteApiProdutos)
     mock.verificar_existencia_produto = AsyncMock(return_value=True)
     mock.obter_detalhes_produto = AsyncMock()
+    mock.obter_detalhes_produtos = AsyncMock()
     return mock
 
 @pytest_asyncio.fixture(scope="function")
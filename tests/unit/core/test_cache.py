@@ -0,0 +1,31 @@
+from app.core.cache import AUSENTE, CacheLocal
+
+
+def test_cache_local_descarta_o_item_menos_recentemente_usado():
+    """
+    Testa se, ao atingir o tamanho máximo, o item menos recentemente usado é descartado.
+    """
+    cache = CacheLocal(tamanho_maximo=2, ttl_segundos=60)
+    cache.definir("a", 1)
+    cache.definir("b", 2)
+    cache.obter("a")
+    cache.definir("c", 3)
+
+    assert cache.obter("a") == 1
+    assert cache.obter("b") is AUSENTE
+    assert cache.obter("c") == 3
+
+
+def test_cache_local_expira_itens_e_contabiliza_hits_e_misses(mocker):
+    """
+    Testa a expiração por TTL e os contadores de acertos e falhas.
+    """
+    mock_monotonic = mocker.patch("app.core.cache.time.monotonic", return_value=100.0)
+    cache = CacheLocal(tamanho_maximo=10, ttl_segundos=5)
+    cache.definir("a", None)
+
+    assert cache.obter("a") is None
+    mock_monotonic.return_value = 106.0
+    assert cache.obter("a") is AUSENTE
+
+    assert cache.estatisticas() == {"itens": 0, "tamanho_maximo": 10, "hits": 1, "misses": 1}
@@ -0,0 +1,48 @@
+import pytest
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitoAbertoError, EstadoCircuito
+
+
+async def executar_com_falha(circuito: CircuitBreaker):
+    with pytest.raises(RuntimeError):
+        async with circuito.proteger():
+            raise RuntimeError("falha na dependência")
+
+
+@pytest.mark.asyncio
+async def test_circuito_abre_apos_falhas_consecutivas_e_rejeita_chamadas():
+    """
+    Testa se o circuito abre ao atingir o limite de falhas e passa a rejeitar chamadas.
+    """
+    circuito = CircuitBreaker(nome="teste", limite_falhas=2, tempo_recuperacao_segundos=30)
+
+    await executar_com_falha(circuito)
+    assert circuito.estado == EstadoCircuito.FECHADO
+    await executar_com_falha(circuito)
+    assert circuito.estado == EstadoCircuito.ABERTO
+
+    with pytest.raises(CircuitoAbertoError):
+        async with circuito.proteger():
+            pass
+    assert circuito.estatisticas()["total_rejeitadas"] == 1
+
+
+@pytest.mark.asyncio
+async def test_circuito_semi_aberto_fecha_apos_sucesso_ou_reabre_apos_falha(mocker):
+    """
+    Testa a transição para semiaberto após o tempo de recuperação e o resultado da chamada de teste.
+    """
+    mock_monotonic = mocker.patch("app.core.circuit_breaker.time.monotonic", return_value=100.0)
+    circuito = CircuitBreaker(nome="teste", limite_falhas=1, tempo_recuperacao_segundos=10)
+
+    await executar_com_falha(circuito)
+    mock_monotonic.return_value = 111.0
+    assert circuito.estado == EstadoCircuito.SEMI_ABERTO
+
+    await executar_com_falha(circuito)
+    assert circuito.estado == EstadoCircuito.ABERTO
+
+    mock_monotonic.return_value = 122.0
+    async with circuito.proteger():
+        pass
+    assert circuito.estado == EstadoCircuito.FECHADO
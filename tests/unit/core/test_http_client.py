@@ -0,0 +1,19 @@
+import pytest
+
+from app.core import http_client
+
+
+@pytest.mark.asyncio
+async def test_get_http_client_reutiliza_instancia_ate_ser_fechado():
+    """
+    Testa se o cliente HTTP é compartilhado entre chamadas e recriado após o encerramento.
+    """
+    cliente = http_client.get_http_client()
+    assert http_client.get_http_client() is cliente
+
+    await http_client.fechar_http_client()
+    assert cliente.is_closed
+
+    novo_cliente = http_client.get_http_client()
+    assert novo_cliente is not cliente
+    await http_client.fechar_http_client()
@@ -0,0 +1,41 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.limitador_taxa import LimitadorTaxa
+
+
+@pytest.mark.asyncio
+async def test_consumir_envia_chaves_e_limites_ao_redis():
+    """Testa que todas as chaves e seus limites são verificados em uma única chamada atômica."""
+    redis = MagicMock()
+    redis.eval = AsyncMock(return_value=0)
+    limitador = LimitadorTaxa("login", janela_segundos=60)
+
+    espera = await limitador.consumir(redis, {"usuario:a@exemplo.com": 5, "ip:10.0.0.1": 20})
+
+    assert espera == 0
+    argumentos = redis.eval.await_args.args
+    assert argumentos[1:4] == (2, "limite:login:usuario:a@exemplo.com", "limite:login:ip:10.0.0.1")
+    assert argumentos[5] == 60_000
+    assert argumentos[-2:] == (5, 20)
+
+
+@pytest.mark.asyncio
+async def test_consumir_retorna_espera_em_segundos_quando_limite_atingido():
+    """Testa a conversão da espera informada pelo Redis (ms) para segundos, arredondada para cima."""
+    redis = MagicMock()
+    redis.eval = AsyncMock(return_value=12_345)
+    limitador = LimitadorTaxa("login", janela_segundos=60)
+
+    assert await limitador.consumir(redis, {"usuario:a@exemplo.com": 5}) == 13
+
+
+@pytest.mark.asyncio
+async def test_consumir_permite_tentativa_quando_redis_indisponivel():
+    """Testa que o limitador não bloqueia logins quando o Redis falha (fail open)."""
+    redis = MagicMock()
+    redis.eval = AsyncMock(side_effect=ConnectionError("Redis indisponível"))
+    limitador = LimitadorTaxa("login", janela_segundos=60)
+
+    assert await limitador.consumir(redis, {"usuario:a@exemplo.com": 5}) == 0
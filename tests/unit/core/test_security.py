@@ -1,6 +1,7 @@
 import uuid
 
-from jose import jwt
+import pytest
+from jose import JWTError, jwt
 
 from app.core import security
 
@@ -33,3 +34,67 @@ def test_gerar_token_jwt(mocker):
 
     assert payload.get("sub") == id_teste
     assert "exp" in payload
+
+@pytest.mark.asyncio
+async def test_gerar_e_verificar_senha_fora_do_event_loop():
+    """
+    Testa o hash e a verificação de senha executados no pool de threads de senhas.
+    """
+    hash_senha = await security.gerar_hash_senha_async("minhaSenha123")
+
+    assert await security.verificar_senha_async("minhaSenha123", hash_senha) is True
+    assert await security.verificar_senha_async("senha_errada", hash_senha) is False
+    assert security.get_executor_senhas() is security.get_executor_senhas()
+
+def test_verificar_token_equivale_ao_jwt_decode(mocker):
+    """
+    Testa que a verificação rápida aceita os tokens emitidos e guarda o resultado em cache.
+    """
+    mocker.patch("app.core.security.settings.CHAVE_SEGURANCA_JWT", "chave_secreta_para_testes")
+    security.cache_tokens_verificados.limpar()
+    token = security.gerar_token(subject="id-cliente")
+
+    payload = security.verificar_token(token)
+
+    assert payload == jwt.decode(token, "chave_secreta_para_testes", algorithms=[security.ALGORITHM])
+    assert security.verificar_token(token) is payload
+
+@pytest.mark.parametrize(
+    "gerar_token_invalido",
+    [
+        lambda: jwt.encode({"sub": "id", "exp": 4102444800}, "outra_chave", algorithm="HS256"),
+        lambda: jwt.encode({"sub": "id", "exp": 4102444800}, "chave_secreta_para_testes", algorithm="HS512"),
+        lambda: jwt.encode({"sub": "id", "exp": 946684800}, "chave_secreta_para_testes", algorithm="HS256"),
+        lambda: jwt.encode({"sub": "id"}, "chave_secreta_para_testes", algorithm="HS256"),
+        lambda: "token.malformado",
+        lambda: "eyJhbGciOiJIUzI1NiJ9.páyload.c2lnbmF0dXJl",
+    ],
+    ids=["assinatura", "algoritmo", "expirado", "sem_exp", "malformado", "nao_ascii"],
+)
+def test_verificar_token_rejeita_tokens_invalidos(mocker, gerar_token_invalido):
+    """
+    Testa que tokens com assinatura, algoritmo, expiração ou formato inválidos são rejeitados.
+    """
+    mocker.patch("app.core.security.settings.CHAVE_SEGURANCA_JWT", "chave_secreta_para_testes")
+    security.cache_tokens_verificados.limpar()
+
+    with pytest.raises(JWTError):
+        security.verificar_token(gerar_token_invalido())
+
+def test_contexto_senhas_atualiza_hash_com_custo_ou_esquema_diferentes():
+    """
+    Testa que hashes gerados com outro custo ou esquema são marcados para atualização no login.
+    """
+    hash_custo_4 = security.criar_contexto_senhas("bcrypt", custo=4).hash("minhaSenha123")
+
+    contexto_custo_5 = security.criar_contexto_senhas("bcrypt", custo=5)
+    assert contexto_custo_5.verify_and_update("senha_errada", hash_custo_4) == (False, None)
+    senha_valida, novo_hash = contexto_custo_5.verify_and_update("minhaSenha123", hash_custo_4)
+    assert senha_valida is True
+    assert novo_hash.startswith("$2b$05$")
+    assert contexto_custo_5.verify_and_update("minhaSenha123", novo_hash) == (True, None)
+
+    contexto_pbkdf2 = security.criar_contexto_senhas("pbkdf2_sha256", custo=1000)
+    senha_valida, novo_hash = contexto_pbkdf2.verify_and_update("minhaSenha123", hash_custo_4)
+    assert senha_valida is True
+    assert novo_hash.startswith("$pbkdf2-sha256$1000$")
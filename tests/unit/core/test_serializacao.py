@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from app.core.serializacao import FLAG_COMPRIMIDO, CodecCache
+
+PRODUTO = {
+    "ID": "1bf0f365-fbdd-4e21-9746-da27342207a9",
+    "title": "Produto de Teste com Acentuação",
+    "brand": "Marca",
+    "image": "http://example.com/image.png",
+    "price": 99.9,
+    "reviewScore": 4.5,
+}
+
+
+@pytest.mark.parametrize("limite_compressao_bytes", [0, 16])
+def test_codec_cache_codifica_e_decodifica_com_prefixo_de_formato(limite_compressao_bytes):
+    """
+    Testa a ida e volta de um valor, com e sem compressão, e o prefixo de formato gravado.
+    """
+    codec = CodecCache(formato="json", limite_compressao_bytes=limite_compressao_bytes)
+
+    dados = codec.codificar(PRODUTO)
+
+    assert dados[0] == 1
+    assert bool(dados[1] & FLAG_COMPRIMIDO) == (limite_compressao_bytes > 0)
+    assert codec.decodificar(dados) == PRODUTO
+
+
+def test_codec_cache_le_valores_gravados_em_json_texto():
+    """
+    Testa se valores gravados antes dos codecs (JSON em texto) continuam legíveis.
+    """
+    codec = CodecCache()
+
+    assert codec.decodificar(json.dumps(PRODUTO)) == PRODUTO
+    assert codec.decodificar(json.dumps(PRODUTO).encode()) == PRODUTO
+
+
+def test_codec_cache_rejeita_formato_desconhecido():
+    """Testa a validação do formato configurado."""
+    with pytest.raises(ValueError):
+        CodecCache(formato="xml")
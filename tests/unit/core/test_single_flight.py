@@ -0,0 +1,68 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.core.single_flight import SingleFlight, lock_distribuido
+
+
+@pytest.mark.asyncio
+async def test_single_flight_compartilha_execucao_entre_chamadas_concorrentes():
+    """
+    Testa se chamadas concorrentes para a mesma chave executam a função uma única vez.
+    """
+    single_flight = SingleFlight()
+    execucoes = 0
+
+    async def buscar():
+        nonlocal execucoes
+        execucoes += 1
+        await asyncio.sleep(0.01)
+        return {"ID": "id_1"}
+
+    resultados = await asyncio.gather(*(single_flight.executar("id_1", buscar) for _ in range(10)))
+
+    assert execucoes == 1
+    assert all(resultado == {"ID": "id_1"} for resultado in resultados)
+    assert len(single_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propaga_erro_e_permite_nova_tentativa():
+    """
+    Testa se um erro é repassado a todos os chamadores e a chave é liberada em seguida.
+    """
+    single_flight = SingleFlight()
+
+    async def falhar():
+        await asyncio.sleep(0)
+        raise RuntimeError("falha")
+
+    resultados = await asyncio.gather(
+        single_flight.executar("id_1", falhar),
+        single_flight.executar("id_1", falhar),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(resultado, RuntimeError) for resultado in resultados)
+    assert await single_flight.executar("id_1", lambda: asyncio.sleep(0, result="ok")) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_lock_distribuido_exclusivo_e_liberado_apenas_pelo_dono():
+    """
+    Testa se o lock é obtido por um único chamador, liberado ao sair do bloco e se um lock
+    expirado e já obtido por outro chamador não é removido pelo dono anterior.
+    """
+    redis = fakeredis.FakeAsyncRedis()
+
+    async with lock_distribuido(redis, "lock:teste", ttl_ms=5000) as adquirido:
+        assert adquirido is True
+        async with lock_distribuido(redis, "lock:teste", ttl_ms=5000) as concorrente:
+            assert concorrente is False
+        assert await redis.exists("lock:teste")
+    assert not await redis.exists("lock:teste")
+
+    async with lock_distribuido(redis, "lock:teste", ttl_ms=5000) as adquirido:
+        await redis.set("lock:teste", "outro-dono")
+    assert await redis.get("lock:teste") == b"outro-dono"
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.pool import PoolMonitorado
+
+
+@pytest.mark.asyncio
+async def test_pool_monitorado_registra_ocupacao_e_timeouts():
+    """Testa as estatísticas de ocupação, espera e timeout do pool monitorado."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=PoolMonitorado,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        async with engine.connect() as conexao:
+            await conexao.execute(text("SELECT 1"))
+            estatisticas = engine.pool.estatisticas()
+            assert estatisticas["conexoes_em_uso"] == 1
+            assert estatisticas["overflow"] == 0
+
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+        estatisticas = engine.pool.estatisticas()
+        assert estatisticas["conexoes_em_uso"] == 0
+        assert estatisticas["total_obtencoes"] == 2
+        assert estatisticas["total_timeouts"] == 1
+        assert estatisticas["tempo_espera_maximo_ms"] >= 50
+    finally:
+        await engine.dispose()
@@ -0,0 +1,78 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.db import session as sessao_bd
+
+
+async def _obter_sessao_leitura(path_params: dict, db_primario):
+    request = MagicMock()
+    request.path_params = path_params
+    gerador = sessao_bd.get_db_leitura(request, db=db_primario)
+    sessao = await anext(gerador)
+    await gerador.aclose()
+    return sessao
+
+
+@pytest.mark.asyncio
+async def test_get_db_leitura_sem_replica_usa_primario(monkeypatch):
+    """Sem réplica configurada, a sessão de leitura é a própria sessão do primário."""
+    monkeypatch.setattr(sessao_bd, "AsyncSessionLeitura", None)
+    db_primario = MagicMock()
+
+    assert await _obter_sessao_leitura({"id": "cliente-1"}, db_primario) is db_primario
+
+
+@pytest.mark.asyncio
+async def test_get_db_leitura_direciona_para_replica_ou_primario(monkeypatch):
+    """Com réplica, lê dela, exceto quando o cliente do caminho alterou dados há pouco."""
+    sessao_replica = AsyncMock()
+    fabrica_replica = MagicMock()
+    fabrica_replica.return_value.__aenter__ = AsyncMock(return_value=sessao_replica)
+    fabrica_replica.return_value.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(sessao_bd, "AsyncSessionLeitura", fabrica_replica)
+    escrita_recente = AsyncMock(return_value=False)
+    monkeypatch.setattr(sessao_bd, "_teve_escrita_recente", escrita_recente)
+    db_primario = MagicMock()
+
+    assert await _obter_sessao_leitura({"id": "cliente-1"}, db_primario) is sessao_replica
+
+    escrita_recente.return_value = True
+    assert await _obter_sessao_leitura({"id": "cliente-1"}, db_primario) is db_primario
+    escrita_recente.assert_awaited_with("cliente-1")
+
+
+@pytest.mark.asyncio
+async def test_get_fabrica_sessao_leitura_respeita_escrita_recente(monkeypatch):
+    """A fábrica usada na exportação também vai ao primário quando o cliente alterou dados há pouco."""
+    fabrica_replica = MagicMock()
+    monkeypatch.setattr(sessao_bd, "AsyncSessionLeitura", fabrica_replica)
+    escrita_recente = AsyncMock(return_value=False)
+    monkeypatch.setattr(sessao_bd, "_teve_escrita_recente", escrita_recente)
+    request = MagicMock()
+    request.path_params = {"id": "cliente-1"}
+
+    assert await sessao_bd.get_fabrica_sessao_leitura(request) is fabrica_replica
+
+    escrita_recente.return_value = True
+    assert await sessao_bd.get_fabrica_sessao_leitura(request) is sessao_bd.AsyncSessionLocal
+    escrita_recente.assert_awaited_with("cliente-1")
+
+    monkeypatch.setattr(sessao_bd, "AsyncSessionLeitura", None)
+    assert await sessao_bd.get_fabrica_sessao_leitura(request) is sessao_bd.AsyncSessionLocal
+
+
+def test_argumentos_conexao_com_pgbouncer_em_modo_transacao(monkeypatch):
+    """Com PgBouncer em modo transação, os caches de statements são desabilitados e os nomes são únicos."""
+    assert sessao_bd._argumentos_conexao() == {
+        "prepared_statement_cache_size": sessao_bd.settings.BD_CACHE_STATEMENTS_PREPARADOS
+    }
+
+    monkeypatch.setattr(sessao_bd.settings, "BD_PGBOUNCER_MODO_TRANSACAO", True)
+    argumentos = sessao_bd._argumentos_conexao()
+
+    assert argumentos["prepared_statement_cache_size"] == 0
+    assert argumentos["statement_cache_size"] == 0
+    nomear = argumentos["prepared_statement_name_func"]
+    assert nomear() != nomear()
+    assert nomear().startswith("__asyncpg_")
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.services import api_produtos_servico
+from app.services.api_produtos_servico import ClienteApiProdutos, cache_local_produtos
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache_local():
+    """Garante que o cache local do processo não vaze entre os testes."""
+    cache_local_produtos.limpar()
+    yield
+    cache_local_produtos.limpar()
+
+def criar_mock_redis(valores_em_cache: list[str | None]) -> tuple[MagicMock, MagicMock]:
+    """Cria um mock do cliente Redis com MGET e pipeline."""
+    mock_pipe = MagicMock()
+    mock_pipe.execute = AsyncMock()
+    mock_contexto_pipe = MagicMock()
+    mock_contexto_pipe.__aenter__ = AsyncMock(return_value=mock_pipe)
+    mock_contexto_pipe.__aexit__ = AsyncMock(return_value=False)
+
+    mock_redis = MagicMock()
+    mock_redis.mget = AsyncMock(return_value=valores_em_cache)
+    mock_redis.pipeline.return_value = mock_contexto_pipe
+    return mock_redis, mock_pipe
+
+
+@pytest.mark.asyncio
+async def test_obter_detalhes_produtos_busca_na_api_apenas_os_ausentes_no_cache():
+    """
+    Testa se o cache é consultado com um único MGET e se somente os produtos
+    ausentes são buscados na API externa e gravados de volta no cache.
+    """
+    produto_em_cache = {"ID": "id_1", "title": "Produto 1"}
+    produto_da_api = {"ID": "id_2", "title": "Produto 2"}
+    urls_chamadas = []
+
+    def responder(request: httpx.Request) -> httpx.Response:
+        urls_chamadas.append(request.url.path)
+        if request.url.path.endswith("/id_2/"):
+            return httpx.Response(200, json=produto_da_api)
+        return httpx.Response(404)
+
+    cliente_api = ClienteApiProdutos(http_client=httpx.AsyncClient(transport=httpx.MockTransport(responder)))
+    mock_redis, mock_pipe = criar_mock_redis([json.dumps(produto_em_cache), None, None, None, None, None])
+    cliente_api.redis_client = mock_redis
+
+    produtos = await cliente_api.obter_detalhes_produtos(["id_1", "id_2", "id_inexistente"])
+
+    assert produtos == [produto_em_cache, produto_da_api, None]
+    mock_redis.mget.assert_awaited_once_with([
+        "product:id_1", "product:id_2", "product:id_inexistente",
+        "product_not_found:id_1", "product_not_found:id_2", "product_not_found:id_inexistente",
+    ])
+    assert sorted(urls_chamadas) == ["/products/id_2/", "/products/id_inexistente/"]
+    chaves_gravadas = sorted(chamada.args[0] for chamada in mock_pipe.set.call_args_list)
+    assert chaves_gravadas == ["product:id_2", "product_not_found:id_inexistente"]
+    mock_pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_obter_detalhes_produtos_usa_cache_local_antes_do_redis():
+    """
+    Testa se um produto já presente no cache local não é buscado no Redis nem na API.
+    """
+    produto = {"ID": "id_1", "title": "Produto 1"}
+
+    def responder(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=produto)
+
+    cliente_api = ClienteApiProdutos(http_client=httpx.AsyncClient(transport=httpx.MockTransport(responder)))
+    mock_redis, _ = criar_mock_redis([None, None])
+    cliente_api.redis_client = mock_redis
+
+    assert await cliente_api.obter_detalhes_produto("id_1") == produto
+    assert await cliente_api.obter_detalhes_produto("id_1") == produto
+
+    mock_redis.mget.assert_awaited_once()
+    assert cache_local_produtos.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_obter_detalhes_produtos_nao_consulta_api_para_produto_registrado_como_inexistente():
+    """
+    Testa se um produto registrado no cache negativo é retornado como None sem chamar a API.
+    """
+    def responder(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("A API externa não deveria ser chamada")
+
+    cliente_api = ClienteApiProdutos(http_client=httpx.AsyncClient(transport=httpx.MockTransport(responder)))
+    mock_redis, _ = criar_mock_redis([None, "1"])
+    cliente_api.redis_client = mock_redis
+
+    assert await cliente_api.verificar_existencia_produto("id_inexistente") is False
+
+
+@pytest.mark.asyncio
+async def test_obter_detalhes_produtos_serve_entrada_desatualizada_e_revalida_em_segundo_plano(mocker):
+    """
+    Testa se uma entrada além do TTL é servida imediatamente e atualizada em segundo plano,
+    e se o valor desatualizado continua sendo servido quando a API externa está indisponível.
+    """
+    mocker.patch.object(api_produtos_servico.settings, "CACHE_TTL_SEGUNDOS", 300)
+    produto_antigo = {"ID": "id_1", "title": "Produto antigo"}
+    entrada_desatualizada = json.dumps({"produto": produto_antigo, "atualizado_em": time.time() - 301})
+
+    def responder(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("API indisponível", request=request)
+
+    cliente_api = ClienteApiProdutos(http_client=httpx.AsyncClient(transport=httpx.MockTransport(responder)))
+    mock_redis, mock_pipe = criar_mock_redis([entrada_desatualizada, None])
+    cliente_api.redis_client = mock_redis
+
+    assert await cliente_api.obter_detalhes_produto("id_1") == produto_antigo
+    assert len(api_produtos_servico._tarefas_revalidacao) == 1
+
+    await asyncio.gather(*api_produtos_servico._tarefas_revalidacao)
+
+    mock_pipe.execute.assert_not_called()
+    assert await cliente_api.obter_detalhes_produto("id_1") == produto_antigo
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("status_code", "falha_no_disjuntor"),
+    [(500, True), (503, True), (429, True), (400, False), (403, False)],
+)
+async def test_buscar_na_api_converte_erros_em_503(monkeypatch, status_code, falha_no_disjuntor):
+    """
+    Testa que respostas de erro da API externa, exceto 404, resultam em 503, e que apenas
+    5xx e 429 são contabilizados como falhas pelo disjuntor.
+    """
+    circuito = CircuitBreaker(nome="teste", limite_falhas=5, tempo_recuperacao_segundos=30)
+    monkeypatch.setattr(api_produtos_servico, "circuito_api_produtos", circuito)
+
+    def responder(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status_code)
+
+    cliente_api = ClienteApiProdutos(http_client=httpx.AsyncClient(transport=httpx.MockTransport(responder)))
+
+    with pytest.raises(HTTPException) as excinfo:
+        await cliente_api._buscar_na_api("id_1")
+    assert excinfo.value.status_code == 503
+    assert circuito.estatisticas()["total_falhas"] == (1 if falha_no_disjuntor else 0)
+
+
+@pytest.fixture
+def lock_distribuido_com_redis_falso(monkeypatch) -> fakeredis.FakeAsyncRedis:
+    """Lock distribuído habilitado, com esperas curtas, e um Redis em memória para o cache."""
+    monkeypatch.setattr(api_produtos_servico.settings, "CACHE_LOCK_DISTRIBUIDO", True)
+    monkeypatch.setattr(api_produtos_servico.settings, "CACHE_LOCK_INTERVALO_MS", 10)
+    monkeypatch.setattr(api_produtos_servico.settings, "CACHE_LOCK_ESPERA_MS", 200)
+    return fakeredis.FakeAsyncRedis()
+
+def criar_cliente_api_contando_chamadas(redis, produto: dict) -> tuple[ClienteApiProdutos, list[str]]:
+    urls_chamadas = []
+
+    def responder(request: httpx.Request) -> httpx.Response:
+        urls_chamadas.append(request.url.path)
+        return httpx.Response(200, json=produto)
+
+    cliente_api = ClienteApiProdutos(http_client=httpx.AsyncClient(transport=httpx.MockTransport(responder)))
+    cliente_api.redis_client = redis
+    return cliente_api, urls_chamadas
+
+
+@pytest.mark.asyncio
+async def test_buscar_com_lock_dono_do_lock_busca_e_grava_no_cache(lock_distribuido_com_redis_falso):
+    """Testa se quem obtém o lock busca o produto na API, grava no Redis e libera o lock."""
+    redis = lock_distribuido_com_redis_falso
+    produto = {"ID": "id_1", "title": "Produto 1"}
+    cliente_api, urls_chamadas = criar_cliente_api_contando_chamadas(redis, produto)
+
+    assert await cliente_api.obter_detalhes_produto("id_1") == produto
+
+    assert urls_chamadas == ["/products/id_1/"]
+    assert not await redis.exists("lock:product:id_1")
+    entrada = api_produtos_servico.codec_cache_produtos.decodificar(await redis.get("product:id_1"))
+    assert entrada["produto"] == produto
+
+
+@pytest.mark.asyncio
+async def test_buscar_com_lock_aguarda_o_cache_gravado_pelo_dono(lock_distribuido_com_redis_falso):
+    """
+    Testa se, com o lock de outro worker, o produto é servido do cache assim que o dono
+    do lock o grava, sem chamar a API externa.
+    """
+    redis = lock_distribuido_com_redis_falso
+    produto = {"ID": "id_1", "title": "Produto 1"}
+    await redis.set("lock:product:id_1", "outro-worker", px=5000)
+    cliente_api, urls_chamadas = criar_cliente_api_contando_chamadas(redis, produto)
+    outro_worker, _ = criar_cliente_api_contando_chamadas(redis, produto)
+
+    async def gravar_apos_busca():
+        await asyncio.sleep(0.03)
+        await outro_worker._salvar_no_cache({"id_1": produto})
+
+    _, resultado = await asyncio.gather(gravar_apos_busca(), cliente_api._buscar_com_lock("id_1"))
+
+    assert resultado == produto
+    assert urls_chamadas == []
+
+
+@pytest.mark.asyncio
+async def test_buscar_com_lock_busca_na_api_apos_esgotar_a_espera(lock_distribuido_com_redis_falso, monkeypatch):
+    """Testa se, esgotado o tempo de espera pelo dono do lock, o produto é buscado diretamente na API."""
+    monkeypatch.setattr(api_produtos_servico.settings, "CACHE_LOCK_ESPERA_MS", 30)
+    redis = lock_distribuido_com_redis_falso
+    produto = {"ID": "id_1", "title": "Produto 1"}
+    await redis.set("lock:product:id_1", "outro-worker", px=5000)
+    cliente_api, urls_chamadas = criar_cliente_api_contando_chamadas(redis, produto)
+
+    assert await cliente_api._buscar_com_lock("id_1") == produto
+
+    assert urls_chamadas == ["/products/id_1/"]
+    assert await redis.exists("product:id_1")
+    assert await redis.get("lock:product:id_1") == b"outro-worker"
+
+
+@pytest.mark.asyncio
+async def test_invalidar_produtos_remove_do_cache_local_e_do_redis():
+    """Testa se os dados e o registro de inexistência dos produtos são removidos dos dois níveis de cache."""
+    redis = fakeredis.FakeAsyncRedis()
+    cliente_api, urls_chamadas = criar_cliente_api_contando_chamadas(redis, {"ID": "id_1", "title": "Produto novo"})
+    await cliente_api._salvar_no_cache({"id_1": {"ID": "id_1", "title": "Produto antigo"}, "id_2": None})
+    cliente_api._salvar_no_cache_local({"id_1": {"ID": "id_1", "title": "Produto antigo"}, "id_2": None})
+    await redis.set("product:id_3", b"outro")
+
+    await cliente_api.invalidar_produtos(["id_1", "id_2"])
+
+    assert cache_local_produtos.obter("product:id_1") is api_produtos_servico.AUSENTE
+    assert cache_local_produtos.obter("product:id_2") is api_produtos_servico.AUSENTE
+    assert await redis.keys() == [b"product:id_3"]
+    assert await cliente_api.obter_detalhes_produto("id_1") == {"ID": "id_1", "title": "Produto novo"}
+    assert urls_chamadas == ["/products/id_1/"]
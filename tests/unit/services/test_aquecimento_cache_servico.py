@@ -0,0 +1,58 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+import pytest
+
+from app.services import aquecimento_cache_servico
+
+
+@pytest.mark.asyncio
+async def test_aquecer_cache_produtos_carrega_os_mais_favoritados_em_lotes():
+    """
+    Testa se os produtos mais favoritados são carregados no cache em lotes do tamanho configurado.
+    """
+    mock_db = AsyncMock()
+    mock_resultado = MagicMock()
+    mock_resultado.scalars.return_value.all.return_value = ["id_1", "id_2", "id_3"]
+    mock_db.execute.return_value = mock_resultado
+
+    mock_api_produtos = AsyncMock()
+    mock_api_produtos.obter_detalhes_produtos.side_effect = [
+        [{"ID": "id_1"}, {"ID": "id_2"}],
+        [None],
+    ]
+
+    total = await aquecimento_cache_servico.aquecer_cache_produtos(
+        db=mock_db,
+        cliente_api_produtos=mock_api_produtos,
+        limite=3,
+        tamanho_lote=2,
+    )
+
+    assert total == 2
+    assert mock_api_produtos.obter_detalhes_produtos.await_args_list[0].args == (["id_1", "id_2"],)
+    assert mock_api_produtos.obter_detalhes_produtos.await_args_list[1].args == (["id_3"],)
+
+
+@pytest.mark.asyncio
+async def test_aquecimento_na_inicializacao_executado_por_um_worker(monkeypatch):
+    """
+    Testa que, com vários workers iniciando ao mesmo tempo, apenas o que obtém o lock
+    no Redis aquece o cache.
+    """
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(aquecimento_cache_servico, "get_redis_client", lambda: redis)
+
+    async def aquecimento_demorado():
+        await asyncio.sleep(0.05)
+        return 1
+
+    executar_aquecimento = AsyncMock(side_effect=aquecimento_demorado)
+    monkeypatch.setattr(aquecimento_cache_servico, "executar_aquecimento_cache", executar_aquecimento)
+
+    await asyncio.gather(*(
+        aquecimento_cache_servico.executar_aquecimento_cache_na_inicializacao() for _ in range(4)
+    ))
+
+    executar_aquecimento.assert_awaited_once()
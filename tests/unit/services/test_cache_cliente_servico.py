@@ -0,0 +1,105 @@
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+import pytest
+
+from app.db.models import Cliente
+from app.services import cache_cliente_servico
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache_local():
+    cache_cliente_servico.cache_local_clientes.limpar()
+    yield
+    cache_cliente_servico.cache_local_clientes.limpar()
+
+@pytest.fixture
+def mock_redis(monkeypatch) -> MagicMock:
+    redis = MagicMock()
+    redis.get = AsyncMock(return_value=None)
+    redis.set = AsyncMock()
+    redis.delete = AsyncMock()
+    monkeypatch.setattr(cache_cliente_servico, "get_redis_client", lambda: redis)
+    return redis
+
+def criar_cliente() -> Cliente:
+    return Cliente(
+        id=uuid.uuid4(),
+        nome="Cliente de Teste",
+        email="teste@exemplo.com",
+        hash_senha="hash",
+        created_at=datetime(2025, 9, 10, 12, 0, 0),
+        updated_at=datetime(2025, 9, 11, 12, 0, 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_armazenar_e_obter_cliente_sem_hash_da_senha(mock_redis):
+    """Testa que o cliente é guardado sem o hash da senha e reconstruído a partir do Redis."""
+    cliente = criar_cliente()
+    await cache_cliente_servico.armazenar(cliente)
+
+    chave, valor = mock_redis.set.await_args.args
+    assert chave == f"cliente:{cliente.id}"
+    assert "hash" not in valor
+
+    cache_cliente_servico.cache_local_clientes.limpar()
+    mock_redis.get.return_value = valor
+    cliente_em_cache = await cache_cliente_servico.obter(cliente.id)
+
+    assert cliente_em_cache.id == cliente.id
+    assert cliente_em_cache.email == cliente.email
+    assert cliente_em_cache.updated_at == cliente.updated_at
+    assert cliente_em_cache.hash_senha is None
+
+
+@pytest.mark.asyncio
+async def test_invalidar_remove_do_cache_local_e_do_redis(mock_redis):
+    """Testa que a invalidação remove o cliente dos dois níveis de cache."""
+    cliente = criar_cliente()
+    await cache_cliente_servico.armazenar(cliente)
+    assert await cache_cliente_servico.obter(cliente.id) is not None
+    mock_redis.get.assert_not_awaited()
+
+    await cache_cliente_servico.invalidar(cliente.id)
+
+    mock_redis.delete.assert_awaited_once_with(f"cliente:{cliente.id}")
+    assert await cache_cliente_servico.obter(cliente.id) is None
+
+
+@pytest.mark.asyncio
+async def test_obter_retorna_none_quando_redis_indisponivel(mock_redis):
+    """Testa que uma falha do Redis é tratada como ausência no cache."""
+    mock_redis.get.side_effect = ConnectionError("Redis indisponível")
+
+    assert await cache_cliente_servico.obter(uuid.uuid4()) is None
+
+
+@pytest.mark.asyncio
+async def test_versao_token_desconhecida_e_republicacao_nao_desfaz_revogacao(monkeypatch):
+    """
+    Testa que uma versão ausente é tratada como desconhecida e que republicar uma versão
+    mais antiga, lida do banco, não desfaz uma revogação já publicada.
+    """
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(cache_cliente_servico, "get_redis_client", lambda: redis)
+    cliente_id = uuid.uuid4()
+
+    assert await cache_cliente_servico.obter_versao_token(cliente_id) is None
+
+    await cache_cliente_servico.registrar_versao_token(cliente_id, 2)
+    await cache_cliente_servico.republicar_versao_token(cliente_id, 1)
+    assert await cache_cliente_servico.obter_versao_token(cliente_id) == 2
+
+    await cache_cliente_servico.descartar_versao_token(cliente_id)
+    assert await cache_cliente_servico.obter_versao_token(cliente_id) is None
+
+@pytest.mark.asyncio
+async def test_registrar_versao_token_propaga_falha_do_redis(mock_redis):
+    """Testa que a falha ao publicar uma revogação não é silenciada."""
+    mock_redis.eval = AsyncMock(side_effect=ConnectionError("Redis indisponível"))
+
+    with pytest.raises(ConnectionError):
+        await cache_cliente_servico.registrar_versao_token(uuid.uuid4(), 1)
@@ -0,0 +1,198 @@
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+import fakeredis
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Cliente, ProdutoFavorito
+from app.services import cache_favoritos_servico, produto_favorito_servico
+
+INSTANTE = datetime(2025, 9, 10, 12, 0, 0)
+
+
+@pytest.fixture
+def servidor_redis() -> fakeredis.FakeServer:
+    return fakeredis.FakeServer()
+
+@pytest.fixture(autouse=True)
+def redis_falso(monkeypatch, servidor_redis: fakeredis.FakeServer) -> fakeredis.FakeAsyncRedis:
+    """Redis em memória no lugar do cliente real e cache de favoritos habilitado."""
+    redis = fakeredis.FakeAsyncRedis(server=servidor_redis, decode_responses=True)
+    monkeypatch.setattr(cache_favoritos_servico, "get_redis_client", lambda: redis)
+    monkeypatch.setattr(settings, "FAVORITOS_CACHE_REDIS", True)
+    return redis
+
+@pytest.fixture
+def mock_api_produtos() -> AsyncMock:
+    mock = AsyncMock()
+    mock.verificar_existencia_produto.return_value = True
+    mock.obter_detalhes_produtos.side_effect = lambda ids: [{"ID": id_produto} for id_produto in ids]
+    return mock
+
+async def incluir_favoritos(db: AsyncSession, cliente: Cliente, favoritos: list[tuple[str, datetime]]) -> None:
+    """Grava os favoritos direto no banco, sem passar pelo cache, e acerta o contador do cliente."""
+    for produto_id, created_at in favoritos:
+        db.add(ProdutoFavorito(cliente_id=cliente.id, produto_id=produto_id, created_at=created_at))
+    await db.commit()
+    await produto_favorito_servico.reconciliar_contadores_favoritos(db)
+
+@pytest_asyncio.fixture
+async def favoritos_empatados(db_session: AsyncSession, test_cliente: Cliente) -> None:
+    """Cinco favoritos, três deles incluídos no mesmo instante."""
+    await incluir_favoritos(db_session, test_cliente, [
+        ("produto-c", INSTANTE),
+        ("produto-a", INSTANTE),
+        ("produto-b", INSTANTE),
+        ("produto-d", INSTANTE.replace(microsecond=1)),
+        ("produto-e", INSTANTE.replace(second=1)),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_obter_pagina_por_deslocamento(db_session, test_cliente, favoritos_empatados, redis_falso):
+    """
+    Testa que o conjunto é carregado do banco na primeira leitura e paginado por deslocamento,
+    na ordem (created_at, produto_id) usada pelo banco.
+    """
+    primeira = await cache_favoritos_servico.obter_pagina(db_session, test_cliente.id, deslocamento=0, limite=2)
+    segunda = await cache_favoritos_servico.obter_pagina(db_session, test_cliente.id, deslocamento=2, limite=2)
+    ultima = await cache_favoritos_servico.obter_pagina(db_session, test_cliente.id, deslocamento=4, limite=2)
+
+    assert primeira == ([("produto-a", INSTANTE), ("produto-b", INSTANTE)], 5)
+    assert segunda == ([("produto-c", INSTANTE), ("produto-d", INSTANTE.replace(microsecond=1))], 5)
+    assert ultima == ([("produto-e", INSTANTE.replace(second=1))], 5)
+    assert await redis_falso.exists(f"favoritos:{test_cliente.id}")
+
+@pytest.mark.asyncio
+async def test_obter_pagina_com_cursor_desempata_pelo_produto_id(db_session, test_cliente, favoritos_empatados):
+    """
+    Testa que, com cursor, favoritos incluídos no mesmo instante do cursor são desempatados
+    pelo produto_id, com o mesmo resultado da paginação pelo banco.
+    """
+    for apos in [(INSTANTE, "produto-a"), (INSTANTE, "produto-c"), (INSTANTE.replace(second=1), "produto-e")]:
+        pagina_redis = await cache_favoritos_servico.obter_pagina(
+            db_session, test_cliente.id, deslocamento=0, limite=2, apos=apos
+        )
+        pagina_bd = await produto_favorito_servico._buscar_pagina_no_bd(
+            db_session, test_cliente.id, deslocamento=0, limite=2, apos=apos
+        )
+        assert pagina_redis == pagina_bd
+
+    favoritos, _ = await cache_favoritos_servico.obter_pagina(
+        db_session, test_cliente.id, deslocamento=0, limite=10, apos=(INSTANTE, "produto-a")
+    )
+    assert [produto_id for produto_id, _ in favoritos] == ["produto-b", "produto-c", "produto-d", "produto-e"]
+
+@pytest.mark.asyncio
+async def test_obter_pagina_cliente_sem_favoritos(db_session, test_cliente, redis_falso):
+    """Testa que um cliente sem favoritos também tem o conjunto carregado, e não vai ao banco a cada leitura."""
+    assert await cache_favoritos_servico.obter_pagina(db_session, test_cliente.id, 0, 10) == ([], 0)
+    assert await redis_falso.exists(f"favoritos:{test_cliente.id}")
+
+@pytest.mark.asyncio
+async def test_carregar_abortado_por_escrita_concorrente(db_session, test_cliente, redis_falso):
+    """
+    Testa que um favorito incluído enquanto o conjunto é carregado aborta a carga, em vez de
+    gravar no Redis um conjunto sem ele, e que a próxima carga o inclui.
+    """
+    execute_original = db_session.execute
+
+    async def execute_com_escrita_concorrente(*args, **kwargs):
+        resultado = await execute_original(*args, **kwargs)
+        db_session.add(ProdutoFavorito(cliente_id=test_cliente.id, produto_id="concorrente", created_at=INSTANTE))
+        await db_session.commit()
+        await cache_favoritos_servico.adicionar(test_cliente.id, [("concorrente", INSTANTE)])
+        return resultado
+
+    db_session.execute = execute_com_escrita_concorrente
+    assert await cache_favoritos_servico.carregar(db_session, test_cliente.id) is False
+    db_session.execute = execute_original
+
+    assert not await redis_falso.exists(f"favoritos:{test_cliente.id}")
+    assert await cache_favoritos_servico.obter_pagina(db_session, test_cliente.id, 0, 10) == (
+        [("concorrente", INSTANTE)], 1
+    )
+
+@pytest.mark.asyncio
+async def test_escritas_atualizam_o_conjunto_carregado(
+    db_session, test_cliente, favoritos_empatados, mock_api_produtos
+):
+    """Testa que inclusões e remoções, individuais e em lote, são refletidas no conjunto já carregado."""
+    await cache_favoritos_servico.carregar(db_session, test_cliente.id)
+
+    await produto_favorito_servico.adicionar_favorito(db_session, test_cliente, "produto-f", mock_api_produtos)
+    await produto_favorito_servico.remover_favorito(db_session, test_cliente, "produto-a")
+    await produto_favorito_servico.adicionar_favoritos_em_lote(
+        db_session, test_cliente, ["produto-g", "produto-b"], mock_api_produtos
+    )
+    await produto_favorito_servico.remover_favoritos_em_lote(db_session, test_cliente, ["produto-c", "produto-x"])
+
+    favoritos, total = await cache_favoritos_servico.obter_pagina(db_session, test_cliente.id, 0, 10)
+    favoritos_bd, _ = await produto_favorito_servico._buscar_pagina_no_bd(db_session, test_cliente.id, 0, 10, None)
+    assert [produto_id for produto_id, _ in favoritos] == [
+        "produto-b", "produto-d", "produto-e", "produto-f", "produto-g"
+    ]
+    assert total == 5
+    assert favoritos == favoritos_bd
+
+@pytest.mark.asyncio
+async def test_adicionar_e_remover_decidem_pelo_banco_com_conjunto_desatualizado(
+    db_session, test_cliente, mock_api_produtos, redis_falso
+):
+    """
+    Testa que o 404 da remoção e o 409 da inclusão são decididos pelo banco, e não pelo conjunto
+    do Redis, mesmo quando ele diverge do banco.
+    """
+    await cache_favoritos_servico.carregar(db_session, test_cliente.id)
+    await incluir_favoritos(db_session, test_cliente, [("so-no-banco", INSTANTE)])
+    await redis_falso.zadd(f"favoritos:{test_cliente.id}", {"so-no-redis": 0})
+
+    await produto_favorito_servico.remover_favorito(db_session, test_cliente, "so-no-banco")
+    await produto_favorito_servico.adicionar_favorito(db_session, test_cliente, "so-no-redis", mock_api_produtos)
+
+    with pytest.raises(HTTPException) as excinfo:
+        await produto_favorito_servico.adicionar_favorito(db_session, test_cliente, "so-no-redis", mock_api_produtos)
+    assert excinfo.value.status_code == 409
+    with pytest.raises(HTTPException) as excinfo:
+        await produto_favorito_servico.remover_favorito(db_session, test_cliente, "so-no-banco")
+    assert excinfo.value.status_code == 404
+
+    await db_session.refresh(test_cliente)
+    assert test_cliente.total_favoritos == 1
+
+@pytest.mark.asyncio
+async def test_listar_e_gravar_favoritos_com_redis_indisponivel(
+    db_session, test_cliente, favoritos_empatados, mock_api_produtos, servidor_redis
+):
+    """Testa que, com o Redis indisponível, a listagem e as escritas recorrem somente ao banco."""
+    servidor_redis.connected = False
+
+    await produto_favorito_servico.adicionar_favorito(db_session, test_cliente, "produto-f", mock_api_produtos)
+    await produto_favorito_servico.remover_favorito(db_session, test_cliente, "produto-a")
+    produtos, total, _ = await produto_favorito_servico.listar_favoritos(
+        db_session, test_cliente, mock_api_produtos, pagina=1, tamanho=10
+    )
+
+    assert [produto["ID"] for produto in produtos] == [
+        "produto-b", "produto-c", "produto-d", "produto-e", "produto-f"
+    ]
+    assert total == 5
+
+@pytest.mark.asyncio
+async def test_listar_favoritos_carrega_o_conjunto_do_primario(
+    db_session, test_cliente, favoritos_empatados, mock_api_produtos
+):
+    """Testa que, com a listagem na réplica, o conjunto é carregado pela sessão do primário."""
+    db_replica = AsyncMock()
+
+    produtos, total, _ = await produto_favorito_servico.listar_favoritos(
+        db_replica, test_cliente, mock_api_produtos, pagina=1, tamanho=2, db_primario=db_session
+    )
+
+    assert [produto["ID"] for produto in produtos] == ["produto-a", "produto-b"]
+    assert total == 5
+    db_replica.execute.assert_not_awaited()
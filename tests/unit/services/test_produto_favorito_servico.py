@@ -1,6 +1,10 @@
+import base64
+import json
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from fastapi import HTTPException
 
 from app.services import produto_favorito_servico
 
@@ -21,7 +25,9 @@ async def test_listar_favoritos_com_sucesso():
     mock_resultado_count.scalar_one.return_value = total_de_favoritos
 
     mock_resultado_select = MagicMock()
-    mock_resultado_select.scalars.return_value.all.return_value = ids_produtos_favoritos
+    mock_resultado_select.all.return_value = [
+        (id_produto, datetime(2025, 9, 10)) for id_produto in ids_produtos_favoritos
+    ]
 
     mock_db.execute.side_effect = [mock_resultado_count, mock_resultado_select]
 
@@ -29,12 +35,12 @@ async def test_listar_favoritos_com_sucesso():
     produto_detalhado_1 = {"ID": "id_produto_1", "title": "Produto 1"}
     produto_detalhado_2 = {"ID": "id_produto_2", "title": "Produto 2"}
 
-    mock_api_produtos.obter_detalhes_produto.side_effect = [
+    mock_api_produtos.obter_detalhes_produtos.return_value = [
         produto_detalhado_1,
         produto_detalhado_2,
     ]
 
-    produtos, total = await produto_favorito_servico.listar_favoritos(
+    produtos, total, proximo_cursor = await produto_favorito_servico.listar_favoritos(
         db=mock_db,
         cliente=mock_cliente,
         cliente_api_produtos=mock_api_produtos,
@@ -43,13 +49,12 @@ async def test_listar_favoritos_com_sucesso():
     )
 
     assert total == total_de_favoritos
+    assert proximo_cursor is None
     assert len(produtos) == 2
     assert produtos[0]["title"] == "Produto 1"
     assert produtos[1]["title"] == "Produto 2"
 
-    assert mock_api_produtos.obter_detalhes_produto.call_count == 2
-    mock_api_produtos.obter_detalhes_produto.assert_any_call("id_produto_1")
-    mock_api_produtos.obter_detalhes_produto.assert_any_call("id_produto_2")
+    mock_api_produtos.obter_detalhes_produtos.assert_awaited_once_with(ids_produtos_favoritos)
 
 
 @pytest.mark.asyncio
@@ -66,7 +71,7 @@ async def test_listar_favoritos_quando_cliente_nao_tem_favoritos():
     mock_resultado_count.scalar_one.return_value = 0
     mock_db.execute.return_value = mock_resultado_count
 
-    produtos, total = await produto_favorito_servico.listar_favoritos(
+    produtos, total, proximo_cursor = await produto_favorito_servico.listar_favoritos(
         db=mock_db,
         cliente=mock_cliente,
         cliente_api_produtos=mock_api_produtos,
@@ -76,8 +81,9 @@ async def test_listar_favoritos_quando_cliente_nao_tem_favoritos():
 
     assert produtos == []
     assert total == 0
+    assert proximo_cursor is None
 
-    mock_api_produtos.obter_detalhes_produto.assert_not_called()
+    mock_api_produtos.obter_detalhes_produtos.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -94,19 +100,21 @@ async def test_listar_favoritos_quando_api_externa_falha_para_um_produto():
     mock_resultado_count.scalar_one.return_value = 2
 
     mock_resultado_select = MagicMock()
-    mock_resultado_select.scalars.return_value.all.return_value = ids_produtos_favoritos
+    mock_resultado_select.all.return_value = [
+        (id_produto, datetime(2025, 9, 10)) for id_produto in ids_produtos_favoritos
+    ]
 
     mock_db.execute.side_effect = [mock_resultado_count, mock_resultado_select]
 
     mock_api_produtos = AsyncMock()
     produto_detalhado_1 = {"ID": "id_produto_1", "title": "Produto 1"}
 
-    mock_api_produtos.obter_detalhes_produto.side_effect = [
+    mock_api_produtos.obter_detalhes_produtos.return_value = [
         produto_detalhado_1,
         None,
     ]
 
-    produtos, total = await produto_favorito_servico.listar_favoritos(
+    produtos, total, proximo_cursor = await produto_favorito_servico.listar_favoritos(
         db=mock_db,
         cliente=mock_cliente,
         cliente_api_produtos=mock_api_produtos,
@@ -117,4 +125,62 @@ async def test_listar_favoritos_quando_api_externa_falha_para_um_produto():
     assert total == 2
     assert len(produtos) == 1
     assert produtos[0]["title"] == "Produto 1"
-    assert mock_api_produtos.obter_detalhes_produto.call_count == 2
+    mock_api_produtos.obter_detalhes_produtos.assert_awaited_once_with(ids_produtos_favoritos)
+
+
+@pytest.mark.asyncio
+async def test_listar_favoritos_retorna_cursor_quando_ha_proxima_pagina():
+    """
+    Testa se o cursor da próxima página é gerado a partir do último item retornado
+    e se ele pode ser decodificado de volta para a chave de ordenação.
+    """
+    mock_cliente = MagicMock()
+    mock_cliente.id = "id_cliente_teste"
+    mock_db = AsyncMock()
+    criado_em = datetime(2025, 9, 10, 12, 30, 15, 123456)
+
+    mock_resultado_count = MagicMock()
+    mock_resultado_count.scalar_one.return_value = 3
+
+    mock_resultado_select = MagicMock()
+    mock_resultado_select.all.return_value = [
+        ("id_produto_1", criado_em),
+        ("id_produto_2", criado_em),
+        ("id_produto_3", criado_em),
+    ]
+    mock_db.execute.side_effect = [mock_resultado_count, mock_resultado_select]
+
+    mock_api_produtos = AsyncMock()
+    mock_api_produtos.obter_detalhes_produtos.return_value = [{"ID": "id_produto_1"}, {"ID": "id_produto_2"}]
+
+    produtos, total, proximo_cursor = await produto_favorito_servico.listar_favoritos(
+        db=mock_db,
+        cliente=mock_cliente,
+        cliente_api_produtos=mock_api_produtos,
+        pagina=1,
+        tamanho=2
+    )
+
+    assert total == 3
+    assert len(produtos) == 2
+    mock_api_produtos.obter_detalhes_produtos.assert_awaited_once_with(["id_produto_1", "id_produto_2"])
+    assert produto_favorito_servico.decodificar_cursor(proximo_cursor) == (criado_em, "id_produto_2")
+
+
+@pytest.mark.parametrize(
+    "conteudo",
+    [
+        ["2025-09-10T12:30:15+00:00", "id_produto_1"],
+        ["2025-09-10T12:30:15-03:00", "id_produto_1"],
+        ["2025-09-10T12:30:15", "id_produto_1", "extra"],
+        ["nao-e-uma-data", "id_produto_1"],
+    ],
+    ids=["utc", "outro_fuso", "campos_a_mais", "data_invalida"],
+)
+def test_decodificar_cursor_invalido(conteudo):
+    """Testa que cursores malformados ou com instante com fuso horário são rejeitados com 400."""
+    cursor = base64.urlsafe_b64encode(json.dumps(conteudo).encode("utf-8")).decode("ascii")
+
+    with pytest.raises(HTTPException) as excinfo:
+        produto_favorito_servico.decodificar_cursor(cursor)
+    assert excinfo.value.status_code == 400
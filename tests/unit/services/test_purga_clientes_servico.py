@@ -0,0 +1,44 @@
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db.models import Cliente, ProdutoFavorito
+from app.services import purga_clientes_servico
+
+
+def criar_cliente(deleted_at: datetime | None, produtos: list[str]) -> list:
+    cliente = Cliente(
+        id=uuid.uuid4(),
+        nome="Cliente",
+        email=f"{uuid.uuid4().hex}@exemplo.com",
+        hash_senha="hash",
+        total_favoritos=len(produtos),
+        deleted_at=deleted_at,
+    )
+    favoritos = [ProdutoFavorito(cliente_id=cliente.id, produto_id=produto_id) for produto_id in produtos]
+    return [cliente, *favoritos]
+
+
+@pytest.mark.asyncio
+async def test_purgar_clientes_excluidos_apos_retencao(db_session: AsyncSession):
+    """
+    Testa que apenas os favoritos e os registros de clientes excluídos há mais
+    tempo que a retenção são removidos, em vários lotes.
+    """
+    agora = datetime.now(UTC).replace(tzinfo=None)
+    db_session.add_all(criar_cliente(agora - timedelta(days=40), ["produto-1", "produto-2", "produto-3"]))
+    db_session.add_all(criar_cliente(agora - timedelta(days=1), ["produto-1"]))
+    db_session.add_all(criar_cliente(None, ["produto-1", "produto-2"]))
+    await db_session.commit()
+
+    totais = await purga_clientes_servico.purgar_clientes_excluidos(
+        db_session, retencao_dias=30, tamanho_lote=2, excluir_clientes=True
+    )
+
+    assert totais == {"favoritos": 3, "clientes": 1}
+    assert await db_session.scalar(select(func.count(ProdutoFavorito.id))) == 3
+    assert await db_session.scalar(select(func.count(Cliente.id))) == 2